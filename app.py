@@ -1,39 +1,64 @@
 import streamlit as st
 
+import profiling
 from auth import ensure_auth, logout_button
-from data.analytics import basic_counters  # we'll use this
-from data.data_layer import init_user_data, push_to_cloud
+from data.data_layer import bet_counters, init_user_data, push_to_cloud, sync_status
 from styling import inject_global_css
 from views.bankroll import render_bankroll
 from views.dashboard import render_dashboard
 from views.settings import render_settings
+from views.tipsters import render_tipsters
 from views.wagers import render_wagers
 
 st.set_page_config(page_title="SharpTracker Elite", layout="wide", page_icon="🎯")
 inject_global_css()
 
+profiling.start_run()
+
 user = ensure_auth()
 if user is None:
     st.stop()
 
-init_user_data(user)
+with profiling.timer("load:init_user_data"):
+    init_user_data(user)
 
 # Initialize page state
 if "selected_page" not in st.session_state:
     st.session_state.selected_page = "Dashboard"
 
+
+# Polls the background sync queue without rerunning the whole page.
+@st.fragment(run_every="3s")
+def sync_panel():
+    sync = sync_status()
+    st.caption(f"Last sync: {st.session_state.last_sync}")
+    if sync["status"] == "failed":
+        st.error(f"Sync failed: {sync['error']}")
+        if st.button("🔁 Retry now", use_container_width=True):
+            push_to_cloud()
+    elif sync["pending"] > 0:
+        st.caption(f"⏳ Saving {sync['pending']} change(s)...")
+        if st.button("💾 Sync now", use_container_width=True):
+            push_to_cloud()
+    else:
+        st.caption("✅ All changes saved")
+
+
 # ========== CLEAN SIDEBAR ==========
 with st.sidebar:
     # Header
     st.markdown("### 🎯 SharpTracker")
     st.caption(f"*{user.upper()}*")
 
-    st.caption(f"Last sync: {st.session_state.last_sync}")
+    sync_panel()
+    if st.session_state.get("remote_changed"):
+        st.caption("⚠️ Sheet changed remotely. Reload it from Settings.")
 
     # PROFIT & RTP COUNTERS
-    df_bets = st.session_state.bets_df
-    if not df_bets.empty:
-        counters = basic_counters(df_bets)
+    # From the base frame plus the insert buffer: reading counters does not
+    # materialize freshly logged bets.
+    counters = bet_counters()
+    if counters["total_bets"]:
         col_p1, col_p2 = st.columns(2)
         with col_p1:
             st.metric("Profit", f"${counters['net_pl']:,.0f}")
@@ -42,11 +67,6 @@ with st.sidebar:
     else:
         st.caption("📊 Log bets to see stats")
 
-    if st.session_state.unsaved_count > 0:
-        st.warning(f"**{st.session_state.unsaved_count} unsaved**")
-        if st.button("💾 Sync", use_container_width=True):
-            push_to_cloud()
-
     st.markdown("---")
 
     # Navigation (matches your screenshot exactly)
@@ -62,21 +82,32 @@ with st.sidebar:
         st.session_state.selected_page = "Bankroll"
         st.rerun()
 
+    if st.button("🏆 Tipsters", use_container_width=True):
+        st.session_state.selected_page = "Tipsters"
+        st.rerun()
+
     if st.button("⚙️ Settings", use_container_width=True):
         st.session_state.selected_page = "Settings"
         st.rerun()
 
     st.markdown("---")
     logout_button()
+    profile_slot = st.container()
 
 # ========== ROUTING ==========
 selected = st.session_state.selected_page
 
-if selected == "Dashboard":
-    render_dashboard()
-elif selected == "Wagers":
-    render_wagers(user)
-elif selected == "Bankroll":
-    render_bankroll()
-elif selected == "Settings":
-    render_settings()
+with profiling.timer(f"view:{selected}"):
+    if selected == "Dashboard":
+        render_dashboard()
+    elif selected == "Wagers":
+        render_wagers(user)
+    elif selected == "Bankroll":
+        render_bankroll()
+    elif selected == "Tipsters":
+        render_tipsters()
+    elif selected == "Settings":
+        render_settings()
+
+profiling.end_run()
+profiling.render_panel(profile_slot)
@@ -0,0 +1,75 @@
+"""
+Dashboard metrics cost on a large synthetic history.
+
+    python -m benchmarks.bench_metrics --rows 100000
+
+Compares the single-pass `compute_metrics` engine against the previous
+render path (`_period_stats` x3 + `basic_counters` + `get_streak_stats`).
+"""
+import argparse
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_bets
+from data.analytics import compute_metrics
+from data.schema import coerce_bets
+
+
+def _legacy_render(df):
+    def period(days_back):
+        cutoff = date.today() - timedelta(days=days_back)
+        p = df[df["Date"] >= cutoff]
+        graded = p[p["Status"].isin(["Won", "Lost"])]
+        return (len(p), pd.to_numeric(p["P/L"]).sum(), pd.to_numeric(p["Stake"]).sum(),
+                len(graded[graded["Status"] == "Won"]), len(graded[graded["Status"] == "Lost"]))
+
+    for days in (1, 7, 30):
+        period(days)
+    pd.to_numeric(df["P/L"]).sum()
+    pd.to_numeric(df[df["Status"] == "Pending"]["Stake"]).sum()
+    pd.to_numeric(df["Stake"]).sum()
+    graded = df[df["Status"].isin(["Won", "Lost"])]
+    len(graded[graded["Status"] == "Won"]), len(graded[graded["Status"] == "Lost"])
+    res = graded.sort_values(["Date", "id"], ascending=False)["Status"].tolist()
+    count = 0
+    for r in res:
+        if r != res[0]:
+            break
+        count += 1
+    pd.to_numeric(df["Odds"]).mean()
+    pd.to_numeric(df["Stake"]).mean()
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    df = synthetic_bets(args.rows)
+    # The legacy loader parsed dates into datetime.date objects.
+    df["Date"] = pd.to_datetime(df["Date"]).dt.date
+    typed = coerce_bets(df)
+    legacy = best_of(lambda: _legacy_render(df), args.repeat)
+    engine = best_of(lambda: compute_metrics(df), args.repeat)
+    engine_typed = best_of(lambda: compute_metrics(typed), args.repeat)
+    mb = lambda frame: frame.memory_usage(deep=True).sum() / 2**20
+    print(f"rows={args.rows:,}  memory: {mb(df):.1f} MB raw, {mb(typed):.1f} MB typed")
+    print(f"legacy render path      : {legacy * 1000:8.1f} ms")
+    print(f"compute_metrics (raw)   : {engine * 1000:8.1f} ms  ({legacy / engine:.1f}x)")
+    print(f"compute_metrics (typed) : {engine_typed * 1000:8.1f} ms  ({legacy / engine_typed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
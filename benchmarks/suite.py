@@ -0,0 +1,121 @@
+"""
+Time every hot path on synthetic users of increasing size.
+
+    python -m benchmarks.suite --sizes 1000 10000 100000 1000000 --out bench.json
+
+Each size gets a generated user written to a throwaway SQLite backend (the
+local stand-in for Sheets). The suite then times a cold `init_user_data`
+(load, coerce, legs and equity curve), `basic_counters`, `explode_legs`,
+the bankroll aggregations, the tipster leaderboard, the equity curve rebuild
+(what a back-dated settlement costs on the next dashboard read), the search
+index (built by the first history search) and history filtering. Results are
+printed and optionally written as JSON for regression tracking.
+"""
+import argparse
+import json
+import logging
+import platform
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from benchmarks.bench_metrics import best_of
+from benchmarks.synthetic import UserSpec, synthetic_user
+from data.analytics import balance_series, basic_counters, liquidity_summary, tipster_leaderboard
+from data.backends import SQLiteBackend
+from data.data_layer import get_bets, get_cash, init_user_data
+from data.equity import EquityCurve
+from data.legs import explode_legs
+from data.search import SearchIndex
+from views.wagers import _history_order
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def _setup(spec: UserSpec, db_path: Path) -> str:
+    user = f"bench{spec.bets}"
+    frames = synthetic_user(spec)
+    backend = SQLiteBackend(str(db_path))
+    for name, df in frames.items():
+        backend.replace(f"{name}_{user}", df)
+    st.session_state.username = user
+    st.session_state.backend = backend
+    return user
+
+
+def run_size(spec: UserSpec, repeat: int, workdir: Path) -> dict:
+    user = _setup(spec, workdir / f"bench_{spec.bets}.db")
+    timings = {"init_user_data": best_of(lambda: init_user_data(user, force_refresh=True), repeat)}
+
+    bets, cash = get_bets(), get_cash()
+    legs = st.session_state.legs_df
+    bookies = tuple(st.session_state.meta_df["Bookies"].dropna())
+    day = bets["Date"].iloc[len(bets) // 2]
+
+    timings["basic_counters"] = best_of(lambda: basic_counters(bets), repeat)
+    timings["explode_legs"] = best_of(lambda: explode_legs(bets, legs), repeat)
+    timings["liquidity_summary"] = best_of(lambda: liquidity_summary(bets, cash, bookies), repeat)
+    timings["balance_series"] = best_of(lambda: balance_series(bets, cash), repeat)
+    timings["tipster_leaderboard"] = best_of(lambda: tipster_leaderboard(bets, legs), repeat)
+    timings["equity_rebuild"] = best_of(lambda: EquityCurve.build(bets), repeat)
+    timings["search_index_build"] = best_of(lambda: SearchIndex.build(bets, legs), repeat)
+    timings["history_all"] = best_of(lambda: _history_order(bets, None, "", "Newest first"), repeat)
+    timings["history_search"] = best_of(lambda: _history_order(bets, None, "tipster 3", "Newest first"), repeat)
+    timings["history_day"] = best_of(lambda: _history_order(bets, day, "", "Best P/L"), repeat)
+
+    return {
+        "rows": spec.bets,
+        "legs": len(legs),
+        "cash_rows": len(cash),
+        "memory_mb": round(bets.memory_usage(deep=True).sum() / 2**20, 2),
+        "seconds": {name: round(t, 6) for name, t in timings.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--parlay-ratio", type=float, default=0.2)
+    parser.add_argument("--max-legs", type=int, default=4)
+    parser.add_argument("--bookies", type=int, default=6)
+    parser.add_argument("--tipsters", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    # Bare-mode session_state warns on every access; the numbers are what matter.
+    logging.disable(logging.WARNING)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            spec = UserSpec(
+                bets=size, parlay_ratio=args.parlay_ratio, max_legs=args.max_legs,
+                bookies=args.bookies, tipsters=args.tipsters, seed=args.seed,
+            )
+            result = run_size(spec, args.repeat, Path(tmp))
+            results.append(result)
+            print(f"rows={size:>9,}  legs={result['legs']:,}  memory={result['memory_mb']} MB")
+            for name, secs in result["seconds"].items():
+                print(f"  {name:<20}: {secs * 1000:10.1f} ms")
+
+    if args.out:
+        report = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "repeat": args.repeat,
+            "results": results,
+        }
+        Path(args.out).write_text(json.dumps(report, indent=2))
+        print(f"wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
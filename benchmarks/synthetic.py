@@ -0,0 +1,134 @@
+"""
+Synthetic SharpTracker users for benchmarks.
+
+Frames come out the way a backend returns them (ISO date strings, plain
+object columns), laid out as BETS_COLUMNS / CASH_COLUMNS / META_COLUMNS, so
+they can be written to a backend or fed through coerce_bets/coerce_cash.
+"""
+import json
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from data.schema import BETS_COLUMNS, CASH_COLUMNS, META_COLUMNS
+
+SPORTS = {
+    "Soccer": ["EPL", "La Liga", "Serie A", "Bundesliga"],
+    "Tennis": ["ATP", "WTA"],
+    "Basketball": ["NBA", "EuroLeague"],
+    "Hockey": ["NHL"],
+}
+TYPES = ["Main", "Prop", "Live"]
+
+
+@dataclass
+class UserSpec:
+    bets: int = 10_000
+    parlay_ratio: float = 0.2
+    max_legs: int = 4
+    bookies: int = 6
+    tipsters: int = 8
+    cash: int = 0  # 0 = one transaction per ~50 bets
+    days: int = 730
+    seed: int = 7
+
+
+def _iso_days_back(days: np.ndarray) -> np.ndarray:
+    return (np.datetime64(date.today(), "D") - days.astype("timedelta64[D]")).astype(str)
+
+
+def _legs_json(rng, n_legs: np.ndarray, tipsters) -> list:
+    sports = list(SPORTS)
+    out = []
+    for n in n_legs:
+        legs = []
+        for _ in range(int(n)):
+            sport = sports[rng.integers(len(sports))]
+            leagues = SPORTS[sport]
+            legs.append({
+                "sport": sport,
+                "league": leagues[rng.integers(len(leagues))],
+                "event": f"Team {rng.integers(500)} vs Team {rng.integers(500)}",
+                "odds": round(float(rng.uniform(1.2, 3.0)), 2),
+                "tipster": tipsters[rng.integers(len(tipsters))],
+            })
+        out.append(json.dumps(legs))
+    return out
+
+
+def synthetic_bets(rows: int, seed: int = 7, parlay_ratio: float = 0.0, max_legs: int = 4,
+                   bookies: int = 3, tipsters: int = 0, days: int = 730) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    bookie_names = np.array(["B365", "Pinnacle", "Betfair", "Unibet", "Stake", "Bwin", "888", "Betway"][:bookies])
+    tipster_names = [f"Tipster {i}" for i in range(tipsters)] or [""]
+
+    status = rng.choice(["Won", "Lost", "Pending", "Push"], rows, p=[0.45, 0.45, 0.07, 0.03])
+    odds = np.round(rng.uniform(1.3, 4.0, rows), 2)
+    stake = np.round(rng.uniform(5, 100, rows), 2)
+    sport = rng.choice(list(SPORTS), rows).astype(object)
+    league = np.empty(rows, dtype=object)
+    for name, leagues in SPORTS.items():
+        is_sport = sport == name
+        league[is_sport] = rng.choice(leagues, int(is_sport.sum()))
+    legs = np.full(rows, "", dtype=object)
+
+    parlay = rng.random(rows) < parlay_ratio
+    if parlay.any():
+        n_legs = rng.integers(2, max(max_legs, 2) + 1, size=int(parlay.sum()))
+        legs[parlay] = _legs_json(rng, n_legs, tipster_names)
+        sport[parlay] = "Parlay"
+        league[parlay] = "Multi"
+        odds[parlay] = np.round(odds[parlay] ** np.minimum(n_legs, 3), 2)
+
+    pl = np.where(status == "Won", stake * odds - stake, np.where(status == "Lost", -stake, 0.0))
+    df = pd.DataFrame({
+        "id": np.arange(1, rows + 1),
+        "Date": _iso_days_back(rng.integers(0, days, rows)),
+        "Sport": sport,
+        "League": league,
+        "Bookie": bookie_names[rng.integers(len(bookie_names), size=rows)],
+        "Type": rng.choice(TYPES, rows),
+        "Event": [f"Event {i}" for i in range(rows)],
+        "Odds": odds.astype(object),
+        "Stake": stake.astype(object),
+        "Status": status,
+        "P/L": pl.astype(object),
+        "Cashout_Amt": 0.0,
+        "Legs": legs,
+        "Tipster": rng.choice(tipster_names, rows),
+    })
+    return df[BETS_COLUMNS]
+
+
+def synthetic_cash(rows: int, seed: int = 7, bookies: int = 3, days: int = 730) -> pd.DataFrame:
+    rng = np.random.default_rng(seed + 1)
+    bookie_names = np.array(["B365", "Pinnacle", "Betfair", "Unibet", "Stake", "Bwin", "888", "Betway"][:bookies])
+    kind = rng.choice(["Deposit", "Withdrawal", "Bonus"], rows, p=[0.6, 0.3, 0.1])
+    amount = np.round(rng.uniform(20, 500, rows), 2)
+    return pd.DataFrame({
+        "Date": _iso_days_back(rng.integers(0, days, rows)),
+        "Bookie": bookie_names[rng.integers(len(bookie_names), size=rows)],
+        "Type": kind,
+        "Amount": np.where(kind == "Withdrawal", -amount, amount).astype(object),
+    })[CASH_COLUMNS]
+
+
+def synthetic_user(spec: UserSpec) -> Dict[str, pd.DataFrame]:
+    """{"bets", "cash", "meta"} frames for one user."""
+    bets = synthetic_bets(
+        spec.bets, spec.seed, spec.parlay_ratio, spec.max_legs, spec.bookies, spec.tipsters, spec.days
+    )
+    cash = synthetic_cash(spec.cash or max(spec.bets // 50, 1), spec.seed, spec.bookies, spec.days)
+    lists = {
+        "Sports": list(SPORTS) + ["Parlay"],
+        "Leagues": sorted({lg for leagues in SPORTS.values() for lg in leagues}),
+        "Bookies": sorted(bets["Bookie"].unique()),
+        "Types": TYPES,
+        "Tipsters": [f"Tipster {i}" for i in range(spec.tipsters)],
+    }
+    width = max(len(v) for v in lists.values())
+    meta = pd.DataFrame({k: v + [None] * (width - len(v)) for k, v in lists.items()})[META_COLUMNS]
+    return {"bets": bets, "cash": cash, "meta": meta}
@@ -1,61 +1,588 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from dataclasses import dataclass, field
+from datetime import date
+from statistics import NormalDist
+from typing import Dict, Optional
+
 import pandas as pd
 import numpy as np
 
+from data.schema import STATUSES
+
+
+# Period windows as "days back" from today, narrowest first. `None` = all time.
+PERIODS = {"today": 1, "week": 7, "month": 30, "all": None}
+
+# Monte Carlo: paths per batch (the unit of process-pool sharding), bets
+# drawn per RNG call, and the evenly spaced steps kept for percentile bands.
+SIM_BATCH = 50_000
+SIM_BLOCK = 25
+SIM_BAND_STEPS = 100
+SIM_PERCENTILES = (5, 25, 50, 75, 95)
+
+# Bootstrap CIs: resamples per group, resample-matrix cells per draw, and the
+# group size above which the normal (delta-method) interval is used instead.
+BOOT_RESAMPLES = 2000
+BOOT_CELLS = 4_000_000
+BOOT_EXACT_MAX = 20_000
+BOOT_POOL_MIN_ROWS = 100_000  # below this a process pool (seconds to spawn) costs more than it saves
+# Pool workers start fresh instead of forking the server, whose threads
+# (sync queue, snapshot writers) may hold locks at fork time.
+POOL_CONTEXT = get_context("spawn")
+
+# Calibration bucket edges: decimal odds and implied probability (1/odds).
+ODDS_BUCKETS = (1.0, 1.5, 1.8, 2.0, 2.2, 2.5, 3.0, 4.0, 6.0, np.inf)
+PROB_BUCKETS = (0.0, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 1.0)
+
+STREAK_COLORS = {"Won": "#00ffc8", "Lost": "#ff4b4b"}
+NEUTRAL_COLOR = "#8b949e"
+
+
+@dataclass
+class PeriodStats:
+    bets: int = 0
+    pl: float = 0.0
+    turnover: float = 0.0
+    roi: float = 0.0
+    hit_rate: float = 0.0
+
+
+@dataclass
+class Metrics:
+    periods: Dict[str, PeriodStats] = field(default_factory=dict)
+    open_risk: float = 0.0
+    avg_odds: float = 0.0
+    avg_stake: float = 0.0
+    streak: str = "N/A"
+    streak_color: str = NEUTRAL_COLOR
 
-def get_streak_stats(df):
+    @property
+    def total(self) -> PeriodStats:
+        return self.periods.get("all", PeriodStats())
+
+
+def _num(col: pd.Series) -> np.ndarray:
+    if not pd.api.types.is_numeric_dtype(col):
+        col = pd.to_numeric(col, errors="coerce")
+    return col.to_numpy(float, na_value=np.nan)
+
+
+def _pct(num, den):
+    return np.divide(num * 100, den, out=np.zeros_like(num, dtype=float), where=den > 0)
+
+
+def _streak(won: np.ndarray, lost: np.ndarray, dates: np.ndarray, ids: np.ndarray):
+    graded = np.flatnonzero(won | lost)
+    if graded.size == 0:
+        return "0-0", NEUTRAL_COLOR
+    # Newest first: by Date, then id.
+    order = graded[np.lexsort((ids[graded], dates[graded]))[::-1]]
+    won = won[order]
+    breaks = np.flatnonzero(won != won[0])
+    count = int(breaks[0]) if breaks.size else int(won.size)
+    curr = "Won" if won[0] else "Lost"
+    return f"{count} {curr}", STREAK_COLORS[curr]
+
+
+def compute_metrics(df: pd.DataFrame, today: Optional[date] = None) -> Metrics:
+    """
+    All dashboard/sidebar counters in one pass: each bet is assigned to the
+    narrowest period window it falls in, per-window sums come from a single
+    bincount per column, and a cumulative sum widens them to today/week/
+    month/all.
+    """
     if df.empty:
-        return "N/A", "#8b949e"
+        return Metrics(periods={name: PeriodStats() for name in PERIODS})
+
+    pl = np.nan_to_num(_num(df["P/L"]))
+    stake = np.nan_to_num(_num(df["Stake"]))
+    odds = _num(df["Odds"])
+    # Categorical codes: free when Status is already typed by data/schema.py.
+    status = pd.Categorical(df["Status"], categories=STATUSES).codes
+    dates = df["Date"]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates)
+    dates = dates.to_numpy().astype("datetime64[D]")
+    ids = np.nan_to_num(_num(df["id"]))
+
+    today = np.datetime64(today or date.today(), "D")
+    age = (today - dates).astype(float)
+    windows = [days for days in PERIODS.values() if days is not None]
+    bucket = np.searchsorted(np.array(windows, dtype=float), age, side="left")
+    bucket[np.isnat(dates)] = len(windows)  # undated bets only count towards "all"
+
+    n = len(PERIODS)
+    won = status == STATUSES.index("Won")
+    lost = status == STATUSES.index("Lost")
+    bets_w = np.bincount(bucket, minlength=n).cumsum()
+    pl_w = np.bincount(bucket, weights=pl, minlength=n).cumsum()
+    stake_w = np.bincount(bucket, weights=stake, minlength=n).cumsum()
+    won_w = np.bincount(bucket, weights=won, minlength=n).cumsum()
+    graded_w = won_w + np.bincount(bucket, weights=lost, minlength=n).cumsum()
 
-    graded = df[df["Status"].isin(["Won", "Lost"])].sort_values(
-        ["Date", "id"], ascending=False
+    roi_w = _pct(pl_w, stake_w)
+    hit_w = _pct(won_w, graded_w)
+    periods = {
+        name: PeriodStats(
+            bets=int(bets_w[i]),
+            pl=float(pl_w[i]),
+            turnover=float(stake_w[i]),
+            roi=float(roi_w[i]),
+            hit_rate=float(hit_w[i]),
+        )
+        for i, name in enumerate(PERIODS)
+    }
+
+    streak, color = _streak(won, lost, dates, ids)
+    return Metrics(
+        periods=periods,
+        open_risk=float(stake[status == STATUSES.index("Pending")].sum()),
+        avg_odds=float(np.nanmean(odds)) if np.isfinite(odds).any() else 0.0,
+        avg_stake=float(stake.mean()),
+        streak=streak,
+        streak_color=color,
     )
-    if graded.empty:
-        return "0-0", "#8b949e"
-
-    res = graded["Status"].tolist()
-    curr, count = res[0], 0
-    for r in res:
-        if r == curr:
-            count += 1
-        else:
-            break
 
-    color = "#00ffc8" if curr == "Won" else "#ff4b4b"
-    return f"{count} {curr}", color
 
+def counter_sums(df: pd.DataFrame) -> Dict[str, float]:
+    """Additive totals behind basic_counters: the sums of two frames add up to their concat's."""
+    pl = np.nan_to_num(_num(df["P/L"]))
+    stake = np.nan_to_num(_num(df["Stake"]))
+    status = pd.Categorical(df["Status"], categories=STATUSES).codes
+    won = status == STATUSES.index("Won")
+    return {
+        "bets": len(df),
+        "pl": float(pl.sum()),
+        "stake": float(stake.sum()),
+        "won": int(won.sum()),
+        "graded": int((won | (status == STATUSES.index("Lost"))).sum()),
+        "open_risk": float(stake[status == STATUSES.index("Pending")].sum()),
+    }
 
-def basic_counters(df):
-    """Core betting metrics"""
-    if df.empty:
-        return {
-            'total_bets': 0,
-            'net_pl': 0,
-            'open_risk': 0,
-            'accuracy_pct': 0,
-            'roi_pct': 0,
-            'turnover': 0
-        }
-
-    # Basic stats
-    total_bets = len(df)
-    net_pl = pd.to_numeric(df["P/L"]).sum()
-    open_risk = pd.to_numeric(df[df["Status"] == "Pending"]["Stake"]).sum()
-    turnover = pd.to_numeric(df["Stake"]).sum()
-
-    # Win/Loss for accuracy
-    graded = df[df["Status"].isin(["Won", "Lost"])]
-    won = len(graded[graded["Status"] == "Won"])
-    lost = len(graded[graded["Status"] == "Lost"])
-    accuracy_pct = (won / (won + lost) * 100) if (won + lost) > 0 else 0
-
-    # ROI
-    roi_pct = (net_pl / turnover * 100) if turnover > 0 else 0
 
+def counters_from_sums(sums: Dict[str, float]) -> Dict[str, float]:
     return {
-        'total_bets': total_bets,
-        'net_pl': net_pl,
-        'open_risk': open_risk,
-        'accuracy_pct': accuracy_pct,
-        'roi_pct': roi_pct,
-        'turnover': turnover
+        'total_bets': int(sums["bets"]),
+        'net_pl': sums["pl"],
+        'open_risk': sums["open_risk"],
+        'accuracy_pct': sums["won"] * 100 / sums["graded"] if sums["graded"] else 0.0,
+        'roi_pct': sums["pl"] * 100 / sums["stake"] if sums["stake"] > 0 else 0.0,
+        'turnover': sums["stake"],
     }
+
+
+def basic_counters(df):
+    """Core betting metrics"""
+    return counters_from_sums(counter_sums(df))
+
+
+def liquidity_summary(bets: pd.DataFrame, cash: pd.DataFrame, bookies) -> pd.DataFrame:
+    """Net cash, P/L, open risk and balance per bookie, one groupby per table."""
+    bookies = pd.Index(pd.unique(pd.Series(list(bookies), dtype=object).dropna()))
+    net_cash = cash.groupby("Bookie", observed=True)["Amount"].sum()
+    pl = bets.groupby("Bookie", observed=True)["P/L"].sum()
+    pending = bets[bets["Status"] == "Pending"]
+    risk = pending.groupby("Bookie", observed=True)["Stake"].sum()
+
+    out = pd.DataFrame({
+        "Net Cash": net_cash.reindex(bookies, fill_value=0.0),
+        "Total P/L": pl.reindex(bookies, fill_value=0.0),
+        "Open Risk": risk.reindex(bookies, fill_value=0.0),
+    })
+    out["Balance (incl. open risk)"] = out["Net Cash"] + out["Total P/L"] - out["Open Risk"]
+    return out.rename_axis("Bookie").reset_index()
+
+
+def balance_series(bets: pd.DataFrame, cash: pd.DataFrame) -> pd.DataFrame:
+    """
+    Running balance per bookie over time: cash flows plus settled P/L, summed
+    per (bookie, day) and accumulated. Wide frame indexed by Date with one
+    column per bookie, carried forward on days a bookie has no activity.
+    """
+    settled = bets[(bets["Status"] != "Pending") & bets["Date"].notna()]
+    flows = pd.concat([
+        pd.DataFrame({
+            "Date": cash["Date"], "Bookie": cash["Bookie"].astype(str), "Amount": cash["Amount"],
+        }),
+        pd.DataFrame({
+            "Date": settled["Date"], "Bookie": settled["Bookie"].astype(str), "Amount": settled["P/L"],
+        }),
+    ], ignore_index=True).dropna(subset=["Date"])
+    if flows.empty:
+        return pd.DataFrame()
+
+    daily = flows.groupby(["Date", "Bookie"])["Amount"].sum().unstack("Bookie", fill_value=0.0)
+    return daily.sort_index().cumsum()
+
+
+def resample_closes(x: pd.Series, y: pd.Series, freq: str) -> pd.Series:
+    """Last value of `y` per calendar period ("D" or "W"), indexed by period end."""
+    s = pd.Series(np.asarray(y, dtype=float), index=pd.DatetimeIndex(x))
+    s = s[s.index.notna()]
+    if s.empty:
+        return s
+    closes = s.groupby(s.index.normalize()).last()
+    return closes if freq == "D" else closes.resample(freq).last().dropna()
+
+
+def downsample_minmax(x, y, budget: int):
+    """
+    At most ~`budget` points of (x, y): the series is cut into budget/2
+    equal-count buckets and each keeps its lowest and highest point, plus the
+    first and last. Peaks and drawdown troughs survive, order is kept.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= budget or budget < 4:
+        return x, y
+    buckets = budget // 2
+    s = pd.Series(y)
+    groups = s.groupby(np.arange(n) * buckets // n)
+    keep = np.unique(np.concatenate([[0, n - 1], groups.idxmin().to_numpy(), groups.idxmax().to_numpy()]))
+    return np.asarray(x)[keep], y[keep]
+
+
+@dataclass
+class Simulation:
+    paths: int
+    horizon: int
+    bankroll: float
+    risk_of_ruin: float
+    expected_drawdown: float
+    drawdown_p95: float
+    median_final: float
+    mean_final: float
+    bands: pd.DataFrame  # index = bets placed, one column per percentile
+
+
+def _sim_pool(bets: pd.DataFrame, method: str):
+    """
+    What each simulated bet is drawn from: settled P/L for bootstrap, or
+    for implied the outcome table [-stake, win amount] per bet (interleaved)
+    plus 1/odds.
+    """
+    settled = bets[bets["Status"] != "Pending"]
+    stake = _num(settled["Stake"])
+    if method == "implied":
+        odds = _num(settled["Odds"])
+        ok = np.isfinite(stake) & np.isfinite(odds) & (stake > 0) & (odds > 1)
+        stake, odds = stake[ok], odds[ok]
+        return np.column_stack([-stake, stake * (odds - 1.0)]).ravel(), 1.0 / odds
+    pl = _num(settled["P/L"])
+    ok = np.isfinite(stake) & np.isfinite(pl) & (stake > 0)
+    return (pl[ok],)
+
+
+def _band_steps(horizon: int) -> np.ndarray:
+    return np.unique(np.linspace(0, horizon - 1, min(SIM_BAND_STEPS, horizon)).astype(int))
+
+
+def _sim_batch(args):
+    """
+    One batch of paths, stepped bet by bet with every path as one vector so
+    the state stays O(paths). Returns (ruined, max drawdowns, finals, band
+    samples). Module-level so process-pool workers can pickle it.
+    """
+    seed, paths, horizon, bankroll, ruin_level, pool = args
+    rng = np.random.default_rng(seed)
+    balance = np.full(paths, float(bankroll))
+    peak = balance.copy()
+    drawdown = np.zeros(paths)
+    ruined = np.zeros(paths, dtype=bool)
+    gap = np.empty(paths)
+    keep = _band_steps(horizon)
+    samples = np.empty((len(keep), paths), dtype=np.float32)
+    k = 0
+
+    for start in range(0, horizon, SIM_BLOCK):
+        n = min(SIM_BLOCK, horizon - start)
+        if len(pool) == 2:
+            # One uniform per bet: the integer part picks a historical bet,
+            # the fraction settles it against 1/odds, and the win flag
+            # selects that bet's loss or win amount (2 * pick + won).
+            outcomes, prob = pool
+            draw = rng.random((n, paths))
+            draw *= len(prob)
+            pick = draw.astype(np.int32)
+            draw -= pick
+            won = draw < prob[pick]
+            pick <<= 1
+            pick += won
+            steps = outcomes[pick]
+        else:
+            steps = pool[0][rng.integers(0, len(pool[0]), size=(n, paths), dtype=np.int32)]
+
+        for i, step in enumerate(steps, start):
+            balance += step
+            # A ruined path stops betting and stays at the ruin level.
+            np.logical_or(ruined, balance <= ruin_level, out=ruined)
+            np.copyto(balance, ruin_level, where=ruined)
+            np.maximum(peak, balance, out=peak)
+            np.subtract(peak, balance, out=gap)
+            np.maximum(drawdown, gap, out=drawdown)
+            if k < len(keep) and keep[k] == i:
+                samples[k] = balance
+                k += 1
+    return ruined, drawdown, balance, samples
+
+
+def _row_percentiles(samples: np.ndarray, q) -> np.ndarray:
+    """
+    np.percentile(samples, q, axis=1) (linear interpolation), sorting the
+    rows in place: numpy's sort is several times faster than the partition
+    percentile does for many wide rows.
+    """
+    samples.sort(axis=1)
+    pos = np.asarray(q, dtype=float) / 100 * (samples.shape[1] - 1)
+    lo = np.floor(pos).astype(int)
+    hi = np.minimum(lo + 1, samples.shape[1] - 1)
+    frac = pos - lo
+    return samples[:, lo] + (samples[:, hi] - samples[:, lo]) * frac
+
+
+def simulate_bankroll(bets: pd.DataFrame, bankroll: float, horizon: int = 250, paths: int = 10_000,
+                      method: str = "bootstrap", ruin_level: float = 0.0, seed: Optional[int] = None,
+                      workers: int = 1) -> Optional[Simulation]:
+    """
+    Monte Carlo over the next `horizon` bets, starting from `bankroll`.
+
+    "bootstrap" resamples the P/L of settled bets; "implied" resamples
+    (stake, odds) and settles each bet with the bookie's implied probability
+    1/odds, i.e. a no-edge baseline. Stakes are flat as in history; a path
+    that hits `ruin_level` stops. Paths run in batches of SIM_BATCH; with
+    `workers` > 1 the batches are spread over a process pool. Batches get
+    their own seeds, so results depend on `seed` only, not on `workers`.
+    Returns None without settled history to sample from.
+    """
+    pool = _sim_pool(bets, method)
+    if pool[-1].size == 0 or horizon < 1 or paths < 1:
+        return None
+
+    sizes = [SIM_BATCH] * (paths // SIM_BATCH) + ([paths % SIM_BATCH] if paths % SIM_BATCH else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(sq, n, horizon, bankroll, ruin_level, pool) for sq, n in zip(seeds, sizes)]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=POOL_CONTEXT) as executor:
+            parts = list(executor.map(_sim_batch, jobs))
+    else:
+        parts = [_sim_batch(job) for job in jobs]
+
+    ruined, drawdown, finals = (np.concatenate(p) for p in list(zip(*parts))[:3])
+    samples = np.concatenate([p[3] for p in parts], axis=1)
+    bands = pd.DataFrame(
+        _row_percentiles(samples, SIM_PERCENTILES),
+        index=pd.Index(_band_steps(horizon) + 1, name="Bets"),
+        columns=[f"p{q}" for q in SIM_PERCENTILES],
+    )
+    return Simulation(
+        paths=paths,
+        horizon=horizon,
+        bankroll=bankroll,
+        risk_of_ruin=float(ruined.mean()),
+        expected_drawdown=float(drawdown.mean()),
+        drawdown_p95=float(np.percentile(drawdown, 95)),
+        median_final=float(np.median(finals)),
+        mean_final=float(finals.mean()),
+        bands=bands,
+    )
+
+
+def _ratio_normal(num: np.ndarray, den: np.ndarray, z: float):
+    """Delta-method interval for sum(num) / sum(den), in percent."""
+    n = len(num)
+    r = num.sum() / den.sum()
+    se = np.sqrt(np.sum((num - r * den) ** 2)) / den.sum() * np.sqrt(n / max(n - 1, 1))
+    return (r - z * se) * 100, (r + z * se) * 100
+
+
+def _boot_group(args):
+    """
+    Percentile intervals (ROI low/high, hit rate low/high) for one group.
+    Each chunk of resamples is a (chunk, n) matrix of draw counts built with
+    one bincount; a matmul against the per-bet columns gives every
+    resample's sums at once. Module-level so process-pool workers can
+    pickle it.
+    """
+    seed, stake, pl, won, graded, resamples, level = args
+    n = len(stake)
+    tail = (100 - level * 100) / 2
+    if n > BOOT_EXACT_MAX:
+        z = NormalDist().inv_cdf(0.5 + level / 2)
+        roi = _ratio_normal(pl, stake, z)
+        hit = _ratio_normal(won, graded, z) if graded.any() else (np.nan, np.nan)
+        return (*roi, *hit)
+
+    rng = np.random.default_rng(seed)
+    values = np.column_stack([pl, stake, won, graded])
+    sums = np.empty((resamples, 4))
+    chunk = max(1, BOOT_CELLS // n)
+    for start in range(0, resamples, chunk):
+        b = min(chunk, resamples - start)
+        draws = rng.integers(0, n, size=(b, n)) + np.arange(b)[:, None] * n
+        counts = np.bincount(draws.ravel(), minlength=b * n).reshape(b, n)
+        sums[start:start + b] = counts.astype(float) @ values
+    roi = _pct(sums[:, 0], sums[:, 1])
+    hit = np.where(sums[:, 3] > 0, sums[:, 2] / np.maximum(sums[:, 3], 1) * 100, np.nan)
+    roi_lo, roi_hi = np.percentile(roi, [tail, 100 - tail])
+    hit_lo, hit_hi = np.nanpercentile(hit, [tail, 100 - tail]) if np.isfinite(hit).any() else (np.nan, np.nan)
+    return roi_lo, roi_hi, hit_lo, hit_hi
+
+
+def bootstrap_ci(df: pd.DataFrame, by: str, resamples: int = BOOT_RESAMPLES, level: float = 0.95,
+                 seed: int = 0, workers: int = 1, cluster: Optional[str] = None) -> pd.DataFrame:
+    """
+    ROI and hit rate per `by` group with bootstrap percentile intervals.
+
+    Only settled bets with a stake count (ROI = P/L / stake, hit rate =
+    won / (won + lost)), so pending tickets do not dilute the estimate.
+    With `cluster` (e.g. "id" on exploded parlay legs) rows sharing that
+    value are summed and resampled as one unit, so legs of one ticket,
+    which settle together, do not count as independent draws; "Bets" then
+    counts clusters.
+    Every group gets its own spawned seed; with `workers` > 1 and enough
+    rows, groups are spread over a process pool and the result is the same
+    as a serial run.
+    Sorted by bet count, largest group first.
+    """
+    columns = ["Bets", "ROI", "ROI Low", "ROI High", "Hit Rate", "Hit Low", "Hit High"]
+    status = pd.Categorical(df["Status"], categories=STATUSES).codes
+    stake = np.nan_to_num(_num(df["Stake"]))
+    labels = df[by].astype(str).to_numpy()
+    keep = (status != STATUSES.index("Pending")) & (stake > 0) & df[by].notna().to_numpy() & (labels != "")
+    if not keep.any():
+        return pd.DataFrame(columns=columns)
+
+    settled = pd.DataFrame({
+        "group": labels[keep],
+        "stake": stake[keep],
+        "pl": np.nan_to_num(_num(df["P/L"]))[keep],
+        "won": (status[keep] == STATUSES.index("Won")).astype(float),
+        "graded": np.isin(status[keep], [STATUSES.index("Won"), STATUSES.index("Lost")]).astype(float),
+    })
+    if cluster is not None:
+        settled = settled.assign(cluster=df[cluster].to_numpy()[keep]).groupby(
+            ["group", "cluster"], sort=False
+        )[["stake", "pl", "won", "graded"]].sum().reset_index()
+    groups = [(name, g) for name, g in settled.groupby("group", sort=False)]
+    groups.sort(key=lambda item: -len(item[1]))
+    seeds = np.random.SeedSequence(seed).spawn(len(groups))
+    jobs = [
+        (sq, g["stake"].to_numpy(), g["pl"].to_numpy(), g["won"].to_numpy(), g["graded"].to_numpy(), resamples, level)
+        for sq, (_, g) in zip(seeds, groups)
+    ]
+    if workers > 1 and len(jobs) > 1 and len(settled) >= BOOT_POOL_MIN_ROWS:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=POOL_CONTEXT) as executor:
+            intervals = list(executor.map(_boot_group, jobs))
+    else:
+        intervals = [_boot_group(job) for job in jobs]
+
+    rows = []
+    for (name, g), (roi_lo, roi_hi, hit_lo, hit_hi) in zip(groups, intervals):
+        graded = g["graded"].sum()
+        rows.append((
+            name, len(g), g["pl"].sum() / g["stake"].sum() * 100, roi_lo, roi_hi,
+            g["won"].sum() / graded * 100 if graded else np.nan, hit_lo, hit_hi,
+        ))
+    return pd.DataFrame.from_records(rows, columns=[by] + columns).set_index(by)
+
+
+def tipster_leaderboard(bets: pd.DataFrame, legs: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-tipster totals over singles and parlay legs. Each leg is one pick
+    carrying an equal share of its ticket's stake, P/L and result, like
+    explode_legs; a leg without a tipster falls back to the ticket's.
+    Stake, P/L, ROI and hit rate use settled bets only; Avg Odds is the
+    pick's own odds (the leg price for parlays). Sorted by P/L.
+    """
+    columns = ["Picks", "Open", "Stake", "P/L", "ROI", "Hit Rate", "Avg Odds"]
+    status = pd.Categorical(bets["Status"], categories=STATUSES).codes
+    base = pd.DataFrame({
+        "id": bets["id"].to_numpy(),
+        "Tipster": bets["Tipster"].astype(str).to_numpy(),
+        "Odds": _num(bets["Odds"]),
+        "Stake": np.nan_to_num(_num(bets["Stake"])),
+        "P/L": np.nan_to_num(_num(bets["P/L"])),
+        "open": (status == STATUSES.index("Pending")).astype(float),
+        "won": (status == STATUSES.index("Won")).astype(float),
+        "lost": (status == STATUSES.index("Lost")).astype(float),
+    })
+
+    legs = legs[legs["bet_id"].isin(base["id"])]
+    singles = base[~base["id"].isin(legs["bet_id"])].assign(share=1.0)
+    picks = legs[["bet_id", "tipster", "odds"]].assign(
+        share=1.0 / legs.groupby("bet_id")["leg_no"].transform("size")
+    ).merge(base, left_on="bet_id", right_on="id", how="inner", sort=False)
+    picks["Tipster"] = picks["tipster"].where(picks["tipster"].astype(bool), picks["Tipster"])
+    picks["Odds"] = pd.to_numeric(picks["odds"], errors="coerce")
+
+    keep = ["Tipster", "Odds", "Stake", "P/L", "open", "won", "lost", "share"]
+    rows = pd.concat([singles[keep], picks[keep]], ignore_index=True)
+    rows = rows[rows["Tipster"].str.strip() != ""]
+    if rows.empty:
+        return pd.DataFrame(columns=columns)
+
+    settled = rows["share"] * (1.0 - rows["open"])
+    rows = rows.assign(
+        stake_w=rows["Stake"] * settled,
+        pl_w=rows["P/L"] * settled,
+        won_w=rows["won"] * rows["share"],
+        graded_w=(rows["won"] + rows["lost"]) * rows["share"],
+    )
+    g = rows.groupby("Tipster", sort=False).agg(
+        Picks=("share", "size"),
+        Open=("open", "sum"),
+        Stake=("stake_w", "sum"),
+        pl=("pl_w", "sum"),
+        won=("won_w", "sum"),
+        graded=("graded_w", "sum"),
+        odds=("Odds", "mean"),
+    )
+    out = pd.DataFrame({
+        "Picks": g["Picks"],
+        "Open": g["Open"].astype(int),
+        "Stake": g["Stake"],
+        "P/L": g["pl"],
+        "ROI": _pct(g["pl"].to_numpy(), g["Stake"].to_numpy()),
+        "Hit Rate": _pct(g["won"].to_numpy(), g["graded"].to_numpy()),
+        "Avg Odds": g["odds"],
+    }, index=g.index)
+    return out.sort_values("P/L", ascending=False)
+
+
+def calibration(df: pd.DataFrame, by: str = "odds", edges=None) -> pd.DataFrame:
+    """
+    Settled bets binned by decimal odds (`by="odds"`) or implied probability
+    (`by="implied"`), with bet count, expected hit rate (mean 1/odds),
+    actual hit rate (won / (won + lost)), their gap and ROI per bucket.
+    Empty buckets are kept so the chart axis stays stable.
+    """
+    edges = np.asarray(edges if edges is not None else (ODDS_BUCKETS if by == "odds" else PROB_BUCKETS), dtype=float)
+    status = pd.Categorical(df["Status"], categories=STATUSES).codes
+    odds = _num(df["Odds"])
+    keep = (status != STATUSES.index("Pending")) & (odds > 1)
+    odds, status = odds[keep], status[keep]
+    stake = np.nan_to_num(_num(df["Stake"]))[keep]
+    pl = np.nan_to_num(_num(df["P/L"]))[keep]
+
+    implied = 1.0 / odds
+    buckets = pd.cut(odds if by == "odds" else implied, edges, right=False if by == "odds" else True)
+    codes, n = buckets.codes, len(buckets.categories)
+    binned = codes >= 0
+    codes = codes[binned]
+
+    def total(weights):
+        return np.bincount(codes, weights=weights[binned], minlength=n)
+
+    won = (status == STATUSES.index("Won")).astype(float)
+    graded = won + (status == STATUSES.index("Lost"))
+    expected = _pct(total(implied * graded), total(graded))
+    actual = _pct(total(won), total(graded))
+    return pd.DataFrame({
+        "Bets": np.bincount(codes, minlength=n),
+        "Expected Hit": expected,
+        "Actual Hit": actual,
+        "Edge": actual - expected,
+        "ROI": _pct(total(pl), total(stake)),
+        "P/L": total(pl),
+    }, index=pd.Index(buckets.categories.astype(str), name="Bucket"))
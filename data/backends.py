@@ -0,0 +1,330 @@
+import sqlite3
+from typing import Dict, Iterable, List, Protocol, Set
+
+import pandas as pd
+import streamlit as st
+from streamlit_gsheets import GSheetsConnection
+
+from data.cache import content_fingerprint
+from data.schema import to_storage_frame
+
+NUMERIC_COLUMNS = ["id", "Odds", "Stake", "P/L", "Cashout_Amt", "Amount"]
+
+
+class DeltaUnsupported(Exception):
+    """The backend cannot apply a partial write; rewrite the whole table."""
+
+
+class StorageBackend(Protocol):
+    # Remote backends sit behind the local snapshot cache (data/cache.py).
+    is_remote: bool
+
+    def load(self, table: str, columns: List[str], create_missing: bool = True) -> pd.DataFrame:
+        ...
+
+    def upsert(self, table: str, rows: pd.DataFrame) -> None:
+        """Insert or replace rows by `id`; tables without an id are appended to."""
+
+    def delete(self, table: str, ids: Iterable) -> None:
+        ...
+
+    def clear(self, table: str, columns: List[str]) -> None:
+        ...
+
+    def replace(self, table: str, df: pd.DataFrame) -> None:
+        ...
+
+    def fingerprint(self, table: str) -> str:
+        ...
+
+    def fingerprints(self, tables: Iterable[str]) -> Dict[str, str]:
+        ...
+
+    def remember(self, table: str, df: pd.DataFrame) -> None:
+        """Record that `df` is what the table currently holds (e.g. from a snapshot)."""
+
+    def trust(self, tables: Iterable[str]) -> None:
+        """The remembered layout of `tables` was just confirmed by fingerprint; skip re-reading it."""
+
+
+def _records(df: pd.DataFrame, missing="") -> List[List]:
+    out = to_storage_frame(df).astype(object)
+    out = out.where(out.notna(), missing)
+    return [[v.item() if hasattr(v, "item") else v for v in row] for row in out.values.tolist()]
+
+
+def _fill_missing(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    for col in columns:
+        if col not in df.columns:
+            df[col] = 0.0 if col in NUMERIC_COLUMNS else ""
+    return df
+
+
+# ---------------------------------------------------------------------------
+# Google Sheets
+# ---------------------------------------------------------------------------
+def _col_letter(n: int) -> str:
+    letters = ""
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+class SheetsBackend:
+    """
+    One worksheet per table. Partial writes address rows by position, so the
+    backend remembers the row layout (ids, columns, row count) of every tab
+    as it was last read or written, and re-reads the id column before a
+    positional write unless the sync queue has just confirmed the tab by
+    fingerprint (trust); if the sheet changed underneath, the write is
+    refused with DeltaUnsupported and the table gets a full replace instead.
+    """
+
+    is_remote = True
+
+    def __init__(self, conn: GSheetsConnection):
+        self.conn = conn
+        self._layout: Dict[str, Dict] = {}
+        self._verified: Set[str] = set()
+        self._sheet = None
+
+    def remember(self, table: str, df: pd.DataFrame):
+        self._layout[table] = {
+            "ids": df["id"].tolist() if "id" in df.columns else None,
+            "columns": list(df.columns),
+            "rows": len(df),
+        }
+
+    def trust(self, tables: Iterable[str]):
+        self._verified = set(tables)
+
+    def _spreadsheet(self):
+        # Opening by URL is itself a metadata request; keep the handle.
+        if self._sheet is None:
+            self._sheet = self.conn.client._open_spreadsheet()
+        return self._sheet
+
+    def _worksheet(self, table: str, columns: List[str]):
+        layout = self._layout.get(table)
+        if layout is None or layout["columns"] != list(columns):
+            raise DeltaUnsupported(table)
+        try:
+            return self._spreadsheet().worksheet(table)
+        except AttributeError:
+            # Read-only/public connections expose no worksheet handle.
+            raise DeltaUnsupported(table)
+
+    @staticmethod
+    def _check_ids(ws, table: str, layout: Dict):
+        """Raise DeltaUnsupported unless the sheet's id column still matches the layout."""
+        col = layout["columns"].index("id") + 1
+        on_sheet = pd.to_numeric(pd.Series(ws.col_values(col)[1:], dtype=object), errors="coerce")
+        expected = pd.to_numeric(pd.Series(layout["ids"], dtype=object), errors="coerce")
+        if len(on_sheet) != layout["rows"] or not on_sheet.reset_index(drop=True).equals(expected):
+            raise DeltaUnsupported(table)
+
+    def load(self, table: str, columns: List[str], create_missing: bool = True) -> pd.DataFrame:
+        try:
+            df = _fill_missing(self.conn.read(worksheet=table, ttl="0s"), columns)
+        except Exception:
+            if not create_missing:
+                raise
+            df = pd.DataFrame(columns=columns)
+            self.conn.update(worksheet=table, data=df)
+        self.remember(table, df)
+        return df
+
+    def upsert(self, table: str, rows: pd.DataFrame):
+        if rows.empty:
+            return
+        ws = self._worksheet(table, rows.columns)
+        layout = self._layout[table]
+
+        if layout["ids"] is None:
+            ws.append_rows(_records(rows), value_input_option="USER_ENTERED")
+            layout["rows"] += len(rows)
+            return
+
+        ids = layout["ids"]
+        if len(set(ids)) != len(ids):
+            raise DeltaUnsupported(table)
+        if table not in self._verified:
+            self._check_ids(ws, table, layout)
+        position = {bet_id: pos for pos, bet_id in enumerate(ids)}
+        last_col = _col_letter(len(rows.columns))
+        known = rows["id"].isin(position)
+
+        # Sheet row = position + 2 (1-based rows, header on row 1).
+        updated = rows[known]
+        if not updated.empty:
+            ws.batch_update(
+                [
+                    {"range": f"A{position[i] + 2}:{last_col}{position[i] + 2}", "values": [vals]}
+                    for i, vals in zip(updated["id"], _records(updated))
+                ],
+                value_input_option="USER_ENTERED",
+            )
+
+        inserted = rows[~known]
+        if not inserted.empty:
+            ws.append_rows(_records(inserted), value_input_option="USER_ENTERED")
+            ids.extend(inserted["id"].tolist())
+            layout["rows"] += len(inserted)
+
+    def delete(self, table: str, ids: Iterable):
+        layout = self._layout.get(table)
+        if layout is None or layout["ids"] is None:
+            raise DeltaUnsupported(table)
+        ws = self._worksheet(table, layout["columns"])
+        if table not in self._verified:
+            self._check_ids(ws, table, layout)
+        doomed = set(ids)
+        rows = sorted((pos + 1 for pos, i in enumerate(layout["ids"]) if i in doomed), reverse=True)
+        if not rows:
+            return
+        ws.spreadsheet.batch_update({
+            "requests": [
+                {"deleteDimension": {"range": {
+                    "sheetId": ws.id, "dimension": "ROWS", "startIndex": row, "endIndex": row + 1,
+                }}}
+                for row in rows
+            ]
+        })
+        layout["ids"] = [i for i in layout["ids"] if i not in doomed]
+        layout["rows"] = len(layout["ids"])
+
+    def clear(self, table: str, columns: List[str]):
+        self.replace(table, pd.DataFrame(columns=columns))
+
+    def replace(self, table: str, df: pd.DataFrame):
+        self.conn.update(worksheet=table, data=to_storage_frame(df))
+        self.remember(table, df)
+
+    def fingerprint(self, table: str) -> str:
+        return self.fingerprints([table])[table]
+
+    def fingerprints(self, tables: Iterable[str]) -> Dict[str, str]:
+        """
+        Spreadsheet modified time plus each tab's grid size, fetched from
+        metadata without downloading any cells: two requests however many
+        tabs are asked for. Read-only connections have no metadata access, so
+        fall back to hashing the content.
+        """
+        tables = list(tables)
+        try:
+            sheet = self._spreadsheet()
+            modified = sheet.get_lastUpdateTime()
+            grids = {ws.title: f"{ws.row_count}x{ws.col_count}" for ws in sheet.worksheets()}
+            return {t: f"rev={modified}:{grids[t]}" for t in tables}
+        except Exception:
+            return {t: content_fingerprint(self.conn.read(worksheet=t, ttl="0s")) for t in tables}
+
+
+# ---------------------------------------------------------------------------
+# SQLite
+# ---------------------------------------------------------------------------
+_SQL_TYPES = {
+    "id": "INTEGER PRIMARY KEY",
+    "Odds": "REAL",
+    "Stake": "REAL",
+    "P/L": "REAL",
+    "Cashout_Amt": "REAL",
+    "Amount": "REAL",
+}
+_INDEXED = ["Date", "Status", "Bookie"]
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SQLiteBackend:
+    """One table per tab in a local database file; every write is a transaction."""
+
+    is_remote = False
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def _ensure_table(self, db: sqlite3.Connection, table: str, columns: Iterable[str]):
+        existing = [r[1] for r in db.execute(f"PRAGMA table_info({_quote(table)})")]
+        if not existing:
+            cols = ", ".join(f"{_quote(c)} {_SQL_TYPES.get(c, 'TEXT')}" for c in columns)
+            db.execute(f"CREATE TABLE {_quote(table)} ({cols})")
+            for col in _INDEXED:
+                if col in columns:
+                    db.execute(
+                        f"CREATE INDEX IF NOT EXISTS {_quote(f'ix_{table}_{col}')} "
+                        f"ON {_quote(table)} ({_quote(col)})"
+                    )
+            return
+        for col in columns:
+            if col not in existing:
+                db.execute(f"ALTER TABLE {_quote(table)} ADD COLUMN {_quote(col)} {_SQL_TYPES.get(col, 'TEXT')}")
+
+    def _insert(self, db: sqlite3.Connection, table: str, rows: pd.DataFrame):
+        cols = ", ".join(_quote(c) for c in rows.columns)
+        marks = ", ".join("?" for _ in rows.columns)
+        db.executemany(
+            f"INSERT OR REPLACE INTO {_quote(table)} ({cols}) VALUES ({marks})",
+            _records(rows, missing=None),
+        )
+
+    def load(self, table: str, columns: List[str], create_missing: bool = True) -> pd.DataFrame:
+        with self._connect() as db:
+            self._ensure_table(db, table, columns)
+            df = pd.read_sql_query(f"SELECT * FROM {_quote(table)} ORDER BY rowid", db)
+        return _fill_missing(df, columns)
+
+    def upsert(self, table: str, rows: pd.DataFrame):
+        if rows.empty:
+            return
+        with self._connect() as db:
+            self._ensure_table(db, table, rows.columns)
+            self._insert(db, table, rows)
+
+    def delete(self, table: str, ids: Iterable):
+        with self._connect() as db:
+            db.executemany(f"DELETE FROM {_quote(table)} WHERE id = ?", [(int(i),) for i in ids])
+
+    def clear(self, table: str, columns: List[str]):
+        with self._connect() as db:
+            self._ensure_table(db, table, columns)
+            db.execute(f"DELETE FROM {_quote(table)}")
+
+    def replace(self, table: str, df: pd.DataFrame):
+        with self._connect() as db:
+            self._ensure_table(db, table, df.columns)
+            db.execute(f"DELETE FROM {_quote(table)}")
+            self._insert(db, table, df)
+
+    def fingerprint(self, table: str) -> str:
+        with self._connect() as db:
+            return content_fingerprint(pd.read_sql_query(f"SELECT * FROM {_quote(table)}", db))
+
+    def fingerprints(self, tables: Iterable[str]) -> Dict[str, str]:
+        return {t: self.fingerprint(t) for t in tables}
+
+    def remember(self, table: str, df: pd.DataFrame):
+        pass
+
+    def trust(self, tables: Iterable[str]):
+        pass
+
+
+def backend_from_secrets() -> StorageBackend:
+    """
+    `[storage]` in secrets picks the backend:
+
+        [storage]
+        backend = "sqlite"          # or "gsheets" (default)
+        path = "sharptracker.db"
+    """
+    cfg = st.secrets.get("storage", {})
+    if cfg.get("backend", "gsheets") == "sqlite":
+        return SQLiteBackend(cfg.get("path", "sharptracker.db"))
+    return SheetsBackend(st.connection("gsheets", type=GSheetsConnection))
@@ -0,0 +1,117 @@
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+from streamlit.runtime.scriptrunner import add_script_run_ctx
+
+from data.schema import to_storage_frame
+
+CACHE_DIR = Path(".sharptracker_cache")
+# Stamped on a snapshot whose remote may hold edits it lacks; never matches
+# a real fingerprint, so the next freshness check reloads the tab.
+STALE = "stale"
+
+# Tabs reloaded by a background freshness check, waiting to be picked up by
+# the next rerun of the owning user's session.
+_fresh: Dict[str, Dict[str, Tuple[pd.DataFrame, str]]] = {}
+_fresh_lock = threading.Lock()
+_write_lock = threading.Lock()
+
+
+def _db_path(user: str) -> Path:
+    return CACHE_DIR / f"{user}.sqlite"
+
+
+def _connect(user: str) -> sqlite3.Connection:
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(_db_path(user))
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS _fingerprints ("
+        "tab TEXT PRIMARY KEY, fingerprint TEXT, saved_at TEXT)"
+    )
+    return db
+
+
+def read_snapshot(user: str, tabs: List[str]) -> Optional[Dict[str, Tuple[pd.DataFrame, str]]]:
+    """Return {tab: (frame, fingerprint)} if every tab is cached, else None."""
+    if not _db_path(user).exists():
+        return None
+    try:
+        with _connect(user) as db:
+            rows = dict(db.execute("SELECT tab, fingerprint FROM _fingerprints").fetchall())
+            if any(tab not in rows for tab in tabs):
+                return None
+            return {
+                tab: (pd.read_sql_query(f'SELECT * FROM "{tab}"', db), rows[tab])
+                for tab in tabs
+            }
+    except (sqlite3.Error, pd.errors.DatabaseError):
+        return None
+
+
+def write_snapshot(user: str, tab: str, df: pd.DataFrame, fingerprint: str):
+    with _write_lock, _connect(user) as db:
+        to_storage_frame(df).to_sql(tab, db, if_exists="replace", index=False)
+        db.execute(
+            "INSERT OR REPLACE INTO _fingerprints VALUES (?, ?, ?)",
+            (tab, fingerprint, datetime.now().isoformat(timespec="seconds")),
+        )
+
+
+def content_fingerprint(df: pd.DataFrame) -> str:
+    digest = hashlib.sha1(df.to_csv(index=False).encode()).hexdigest()
+    return f"rows={len(df)}:{digest}"
+
+
+def _start(target: Callable, *args):
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    add_script_run_ctx(thread)
+    thread.start()
+
+
+def save_async(user: str, frames: Dict[str, pd.DataFrame], fingerprint: Callable[[str], str],
+               on_saved: Optional[Callable[[str, str], None]] = None):
+    """Fingerprint the remote tabs and store `frames` as the new snapshot."""
+    frames = {tab: df.copy() for tab, df in frames.items()}
+
+    def run():
+        for tab, df in frames.items():
+            try:
+                fp = fingerprint(tab)
+                write_snapshot(user, tab, df, fp)
+                if on_saved is not None:
+                    on_saved(tab, fp)
+            except Exception:
+                pass
+
+    _start(run)
+
+
+def check_freshness_async(user: str, fingerprints: Dict[str, str],
+                          fingerprint: Callable[[str], str],
+                          read_tab: Callable[[str], pd.DataFrame]):
+    """Reload any tab whose remote fingerprint no longer matches the snapshot."""
+
+    def run():
+        for tab, cached_fp in fingerprints.items():
+            try:
+                fp = fingerprint(tab)
+                if fp == cached_fp:
+                    continue
+                df = read_tab(tab)
+                write_snapshot(user, tab, df, fp)
+                with _fresh_lock:
+                    _fresh.setdefault(user, {})[tab] = (df, fp)
+            except Exception:
+                pass
+
+    _start(run)
+
+
+def pop_fresh(user: str) -> Dict[str, Tuple[pd.DataFrame, str]]:
+    with _fresh_lock:
+        return _fresh.pop(user, {})
@@ -1,76 +1,330 @@
+import itertools
+import threading
+import time
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import List
+from typing import Any, Callable, Dict, Iterable, List
 
+import numpy as np
 import pandas as pd
-from streamlit_gsheets import GSheetsConnection
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
+from data import cache
+from data.analytics import counter_sums, counters_from_sums
+from data.backends import StorageBackend, backend_from_secrets
+from data.equity import EquityCurve
+from data.journal import Journal, journal_for, replay
+from data.legs import parse_legs
+from data.search import SearchIndex
+from data.memo import ANALYTICS_CACHE, freeze
+from data import sync
+from profiling import record, timer
+from data.schema import (
+    BETS_COLUMNS, BETS_DTYPES, CASH_COLUMNS, CASH_DTYPES, META_COLUMNS, STATUSES,
+    coerce_bets, coerce_cash, concat_typed, rows_frame,
+    validate_bet, validate_transaction,
+)
 
-BETS_COLUMNS = [
-    "id", "Date", "Sport", "League", "Bookie", "Type",
-    "Event", "Odds", "Stake", "Status", "P/L", "Cashout_Amt",
-    "Legs", "Tipster",
-]
-CASH_COLUMNS = ["Date", "Bookie", "Type", "Amount"]
-META_COLUMNS = ["Sports", "Leagues", "Bookies", "Types", "Tipsters"]
 
+# Process-wide so a version never repeats across sessions or reloads.
+_versions = itertools.count(1)
 
-def _get_conn() -> GSheetsConnection:
-    return st.connection("gsheets", type=GSheetsConnection)
 
+# ---------------------------------------------------------------------------
+# Frames with buffered appends
+# ---------------------------------------------------------------------------
+# New bets and transactions are not concatenated onto the full frame one at a
+# time. Each validated insert is parked as a plain dict in `<key>_pending`;
+# the first read through get_bets()/get_cash() coerces all pending rows in one
+# go and concats them once. A bulk entry session or import therefore pays one
+# O(n) copy per rerun instead of one per row. Inserts themselves stay O(1):
+# the next bet id and the sidebar counters (bet_counters) are kept from the
+# base frame plus the buffer, without materializing it.
+_FRAME_DTYPES = {"bets_df": BETS_DTYPES, "cash_df": CASH_DTYPES}
 
-def _safe_load(tab_name: str, columns: List[str]) -> pd.DataFrame:
-    conn = _get_conn()
-    try:
-        df = conn.read(worksheet=tab_name, ttl="0s")
-        for col in columns:
-            if col not in df.columns:
-                df[col] = 0.0 if col in ["id", "Odds", "Stake", "P/L", "Cashout_Amt"] else ""
-        return df
-    except Exception:
-        df = pd.DataFrame(columns=columns)
-        conn.update(worksheet=tab_name, data=df)
-        return df
-
-
-def init_user_data(user: str):
+
+def _frame(key: str) -> pd.DataFrame:
+    pending = st.session_state.get(f"{key}_pending")
+    if pending:
+        with timer(f"data:materialize_{key}"):
+            base = st.session_state[key]
+            new = rows_frame(pending, base.columns, _FRAME_DTYPES[key])
+            st.session_state[key] = concat_typed([base, new])
+            pending.clear()
+            st.session_state[f"{key}_version"] = next(_versions)
+    return st.session_state[key]
+
+
+def _set_frame(key: str, df: pd.DataFrame):
+    st.session_state[key] = df
+    st.session_state[f"{key}_pending"] = []
+    if key == "bets_df":
+        top = df["id"].max() if len(df) else 0
+        st.session_state.max_bet_id = 0 if pd.isna(top) else int(top)
+
+
+def _append(key: str, row: Dict) -> pd.DataFrame:
+    """Buffer one row; returns it as an untyped 1-row frame for sync/indexing."""
+    st.session_state.setdefault(f"{key}_pending", []).append(row)
+    return pd.DataFrame([row], columns=st.session_state[key].columns)
+
+
+def get_bets() -> pd.DataFrame:
+    return _frame("bets_df")
+
+
+def get_cash() -> pd.DataFrame:
+    return _frame("cash_df")
+
+
+def _touch(reindex: bool = False, appended: bool = False):
+    """
+    Mark bets_df/cash_df as changed; invalidates memoized analytics.
+    `appended` says the change only added rows to the insert buffer, so
+    results over the base frame alone (bets_df_version) stay valid.
+    `reindex` rebuilds the legs table and equity curve from scratch (loads)
+    and drops the search index until the next search; single-row edits
+    keep them current through _index_bets and _track_equity instead.
+    """
+    st.session_state.data_version = next(_versions)
+    if not appended:
+        st.session_state.bets_df_version = st.session_state.data_version
+    if reindex:
+        bets = get_bets()
+        with timer("load:parse_legs"):
+            st.session_state.legs_df = parse_legs(bets)
+        st.session_state.search_index = None
+        with timer("load:equity"):
+            st.session_state.equity = EquityCurve.build(bets)
+
+
+def _index_bets(rows: pd.DataFrame, new: bool = False):
+    """
+    Re-parse legs and re-index search text for freshly added/edited bets.
+    `new` ids have nothing to replace, so the legs table is not scanned.
+    """
+    new_legs = parse_legs(rows)
+    legs = st.session_state.legs_df
+    if not new:
+        legs = legs[~legs["bet_id"].isin(rows["id"])]
+    if not new_legs.empty:
+        legs = pd.concat([legs, new_legs], ignore_index=True)
+    st.session_state.legs_df = legs
+
+    index = st.session_state.get("search_index")
+    if index is None:
+        return
+    for bet_id, event, tipster in zip(rows["id"], rows["Event"], rows["Tipster"]):
+        bet_legs = new_legs[new_legs["bet_id"] == bet_id]
+        if not new:
+            index.remove(bet_id)
+        index.add(bet_id, [event, tipster, *bet_legs["event"], *bet_legs["tipster"]])
+
+
+def _track_equity(dates, ids, pl):
+    """Fold newly settled bets into the equity curve; out of order = rebuild on next read."""
+    curve = st.session_state.get("equity")
+    if curve is None:
+        return
+    for when, bet_id, amount in sorted(zip(dates, ids, pl), key=lambda r: (r[0], r[1])):
+        if not curve.add(when, bet_id, amount):
+            st.session_state.equity = None
+            return
+
+
+def search_index() -> SearchIndex:
+    """Built on the first search: most sessions never search."""
+    if st.session_state.get("search_index") is None:
+        with timer("data:search_index"):
+            st.session_state.search_index = SearchIndex.build(get_bets(), st.session_state.legs_df)
+    return st.session_state.search_index
+
+
+def equity_curve() -> EquityCurve:
+    if st.session_state.get("equity") is None:
+        with timer("data:equity_rebuild"):
+            st.session_state.equity = EquityCurve.build(get_bets())
+    return st.session_state.equity
+
+
+def bet_counters() -> Dict[str, float]:
+    """Sidebar counters over the base frame (memoized per bets_df_version) plus the insert buffer."""
+    base = st.session_state.bets_df
+    key = (st.session_state.username, st.session_state.bets_df_version, "counter_sums")
+    with timer("analytics:counter_sums"):
+        sums = dict(ANALYTICS_CACHE.get_or_compute(key, lambda: counter_sums(base)))
+        pending = st.session_state.get("bets_df_pending")
+        if pending:
+            for name, value in counter_sums(rows_frame(pending, base.columns, BETS_DTYPES)).items():
+                sums[name] += value
+    return counters_from_sums(sums)
+
+
+def cached_analytics(name: str, compute: Callable[[], Any], filters: Any = ()) -> Any:
+    """Memoize `compute` per (user, data version, name, filters)."""
+    key = (st.session_state.username, st.session_state.data_version, name, freeze(filters))
+
+    def timed_compute():
+        with timer(f"analytics:{name}"):
+            return compute()
+    return ANALYTICS_CACHE.get_or_compute(key, timed_compute)
+
+
+def _get_backend() -> StorageBackend:
+    """
+    The user's backend, shared with their sync queue and every other session
+    of theirs in this process, so positional row layouts stay in one place.
+    """
+    if "backend" not in st.session_state:
+        st.session_state.backend = _sync_queue().backend
+    return st.session_state.backend
+
+
+def _journal() -> Journal:
+    if "journal" not in st.session_state:
+        st.session_state.journal = journal_for(st.session_state.username)
+    return st.session_state.journal
+
+
+def _sync_queue() -> sync.SyncQueue:
+    if "sync_queue" not in st.session_state:
+        # A backend preset on the session (tests, benchmarks) seeds the queue.
+        st.session_state.sync_queue = sync.queue_for(
+            st.session_state.username,
+            lambda: st.session_state.get("backend") or backend_from_secrets(),
+            on_synced=_journal().compact_acked,
+            on_stored=_journal().ack,
+        )
+    return st.session_state.sync_queue
+
+
+def _user_tabs(user: str) -> Dict[str, List[str]]:
+    return {
+        f"bets_{user}": BETS_COLUMNS,
+        f"cash_{user}": CASH_COLUMNS,
+        f"meta_{user}": META_COLUMNS,
+    }
+
+
+def _load_tabs(
+    backend: StorageBackend, tabs: Dict[str, List[str]], coercers: Dict[str, Callable]
+) -> Dict[str, pd.DataFrame]:
+    """
+    Fetch and coerce every tab concurrently, so a cold start costs the
+    slowest round-trip instead of the sum. Each tab's fetch + coerce time
+    goes to the profiler as load:<table>.
+    """
+    ctx = get_script_run_ctx()
+
+    def load(tab: str):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        start = time.perf_counter()
+        df = coercers[tab](backend.load(tab, tabs[tab]))
+        return df, time.perf_counter() - start
+
+    frames = {}
+    with ThreadPoolExecutor(max_workers=len(tabs)) as pool:
+        futures = {pool.submit(load, tab): tab for tab in tabs}
+        for future in as_completed(futures):
+            tab = futures[future]
+            frames[tab], seconds = future.result()
+            record(f"load:{tab.split('_', 1)[0]}", seconds)
+    return frames
+
+
+def _apply_fresh_snapshot(user: str):
+    fresh = cache.pop_fresh(user)
+    if not fresh or "bets_df" not in st.session_state:
+        return
+    if st.session_state.unsaved_count > 0:
+        st.session_state.remote_changed = True
+        return
+
+    targets = {
+        st.session_state.bets_tab: ("bets_df", coerce_bets),
+        st.session_state.cash_tab: ("cash_df", coerce_cash),
+        st.session_state.meta_tab: ("meta_df", lambda df: df),
+    }
+    for tab, (df, fp) in fresh.items():
+        if tab not in targets:
+            continue
+        key, coerce = targets[tab]
+        _set_frame(key, coerce(df))
+        _sync_queue().expect(tab, fp)
+    _touch(reindex=True)
+    st.session_state.last_sync = datetime.now().strftime("%H:%M")
+    st.toast("Loaded newer data from the cloud.")
+
+
+def init_user_data(user: str, force_refresh: bool = False):
+    # Journaled changes are queued again only after a restart; otherwise an
+    # earlier session's queue for this user still holds them. Checked before
+    # anything below creates this user's queue.
+    requeue = not sync.has_queue(user)
     if "unsaved_count" not in st.session_state:
         st.session_state.unsaved_count = 0
     if "last_sync" not in st.session_state:
         st.session_state.last_sync = "Never"
 
     if "bets_df" in st.session_state:
+        _drain_sync_requests()
+    _apply_fresh_snapshot(user)
+
+    if "bets_df" in st.session_state and not force_refresh:
         return
 
-    bets_tab = f"bets_{user}"
-    cash_tab = f"cash_{user}"
-    meta_tab = f"meta_{user}"
+    tabs = _user_tabs(user)
+    bets_tab, cash_tab, meta_tab = tabs
+    backend = _get_backend()
+
+    coercers = {bets_tab: coerce_bets, cash_tab: coerce_cash, meta_tab: lambda df: df}
+
+    def read_tab(tab: str) -> pd.DataFrame:
+        return backend.load(tab, tabs[tab], create_missing=False)
 
     try:
-        b_df = _safe_load(
-            bets_tab,
-            BETS_COLUMNS,
-        )
-        c_df = _safe_load(
-            cash_tab,
-            CASH_COLUMNS,
-        )
-        m_df = _safe_load(
-            meta_tab,
-            META_COLUMNS,
-        )
+        snapshot = None
+        if backend.is_remote and not force_refresh:
+            with timer("load:snapshot"):
+                snapshot = cache.read_snapshot(user, list(tabs))
+
+        if snapshot:
+            frames = {tab: df for tab, (df, _) in snapshot.items()}
+            for tab, (df, fp) in snapshot.items():
+                backend.remember(tab, df)
+                _sync_queue().expect(tab, fp)
+            cache.check_freshness_async(
+                user, {tab: fp for tab, (_, fp) in snapshot.items()}, backend.fingerprint, read_tab
+            )
+            frames = {tab: coercers[tab](df) for tab, df in frames.items()}
+        else:
+            with timer("load:tabs"):
+                frames = _load_tabs(backend, tabs, coercers)
+            if backend.is_remote:
+                cache.save_async(user, frames, backend.fingerprint, on_saved=_sync_queue().expect)
 
-        if not b_df.empty:
-            b_df["Date"] = pd.to_datetime(b_df["Date"]).dt.date
-        if not c_df.empty:
-            c_df["Date"] = pd.to_datetime(c_df["Date"]).dt.date
+        # Changes journaled but never confirmed by the backend are re-applied
+        # locally (and requeued, see above).
+        events = _journal().read()
+        for event in events:
+            tab = event["table"]
+            if tab in frames:
+                frames[tab] = replay(frames[tab], event, coercers[tab])
+        if events:
+            frames = {tab: coercers[tab](df) for tab, df in frames.items()}
 
-        st.session_state.bets_df = b_df
-        st.session_state.cash_df = c_df
-        st.session_state.meta_df = m_df
+        _set_frame("bets_df", frames[bets_tab])
+        _set_frame("cash_df", frames[cash_tab])
+        st.session_state.meta_df = frames[meta_tab]
         st.session_state.bets_tab = bets_tab
         st.session_state.cash_tab = cash_tab
         st.session_state.meta_tab = meta_tab
+        st.session_state.remote_changed = False
+        if requeue:
+            _requeue(events, coercers)
+        _touch(reindex=True)
+        _refresh_unsaved()
         st.session_state.last_sync = datetime.now().strftime("%H:%M")
 
     except Exception as e:
@@ -78,10 +332,37 @@ def init_user_data(user: str):
         st.stop()
 
 
+def refresh_from_cloud(user: str):
+    """Bypass the local snapshot and reload every tab from the backend."""
+    init_user_data(user, force_refresh=True)
+    st.rerun()
+
+
+def _save_snapshot():
+    """
+    Store the local frames, stamped with the fingerprint the sync queue
+    confirmed for each tab, or as stale when the remote may hold edits the
+    frames lack (changed elsewhere since the last load).
+    """
+    backend = _get_backend()
+    if not backend.is_remote:
+        return
+    known = dict(_sync_queue().fingerprints)
+    cache.save_async(
+        st.session_state.username,
+        {
+            st.session_state.bets_tab: get_bets(),
+            st.session_state.cash_tab: get_cash(),
+            st.session_state.meta_tab: st.session_state.meta_df,
+        },
+        lambda tab: known.get(tab) or cache.STALE,
+    )
+
+
 def clear_user_data():
-    conn = _get_conn()
-    empty_bets = pd.DataFrame(columns=BETS_COLUMNS)
-    empty_cash = pd.DataFrame(columns=CASH_COLUMNS)
+    backend = _get_backend()
+    empty_bets = coerce_bets(pd.DataFrame(columns=BETS_COLUMNS))
+    empty_cash = coerce_cash(pd.DataFrame(columns=CASH_COLUMNS))
     current_meta = st.session_state.meta_df.copy()
 
     for col in META_COLUMNS:
@@ -90,30 +371,227 @@ def clear_user_data():
     current_meta = current_meta[META_COLUMNS]
 
     try:
-        conn.update(worksheet=st.session_state.bets_tab, data=empty_bets)
-        conn.update(worksheet=st.session_state.cash_tab, data=empty_cash)
-        conn.update(worksheet=st.session_state.meta_tab, data=current_meta)
+        backend.clear(st.session_state.bets_tab, BETS_COLUMNS)
+        backend.clear(st.session_state.cash_tab, CASH_COLUMNS)
+        backend.replace(st.session_state.meta_tab, current_meta)
     except Exception as e:
         st.error(f"Could not delete user data: {e}")
         return
 
-    st.session_state.bets_df = empty_bets
-    st.session_state.cash_df = empty_cash
+    # Queued edits would resurrect rows in the wiped tabs. Dropped only now,
+    # so a failed clear keeps them.
+    queue = _sync_queue()
+    queue.discard()
+    _journal().compact()
+    for tab in (st.session_state.bets_tab, st.session_state.cash_tab, st.session_state.meta_tab):
+        queue.expect(tab, backend.fingerprint(tab) if backend.is_remote else None)
+
+    _set_frame("bets_df", empty_bets)
+    _set_frame("cash_df", empty_cash)
     st.session_state.meta_df = current_meta
     st.session_state.ticket_legs = []
     st.session_state.ticket_mode = "Single"
-    st.session_state.unsaved_count = 0
+    _touch(reindex=True)
+    _refresh_unsaved()
     st.session_state.last_sync = datetime.now().strftime("%H:%M")
+    _save_snapshot()
     st.success("All wagers and bankroll data were deleted. Settings were kept.")
     st.rerun()
 
 
+# ---------------------------------------------------------------------------
+# Local mutations
+# ---------------------------------------------------------------------------
+# Every change to bets/cash/meta goes through the helpers below. Each one is
+# first appended to the user's on-disk journal (data/journal.py), then handed
+# to the session's write-behind SyncQueue (data/sync.py), which flushes it in
+# the background; nothing here waits on the network.
+
+
+def _refresh_unsaved():
+    st.session_state.unsaved_count = _sync_queue().pending()
+
+
+def _enqueue(table: str, op: str, rows: pd.DataFrame = None, ids: Iterable = None, seq: int = 0):
+    queue = _sync_queue()
+    if op == "delete":
+        queue.delete(table, ids, seq=seq)
+    elif op == "replace":
+        queue.replace(table, rows, seq=seq)
+    else:
+        queue.upsert(table, rows, seq=seq)
+
+
+def _record(event: str, table: str, op: str, rows: pd.DataFrame = None, ids: Iterable = None):
+    """Journal one change, then queue it for the backend."""
+    seq = _journal().append(event, table, op, rows=rows, ids=ids)
+    _enqueue(table, op, rows=rows, ids=ids, seq=seq)
+    _refresh_unsaved()
+
+
+def _requeue(events: List[Dict], coercers: Dict[str, Callable]):
+    for event in events:
+        tab = event["table"]
+        rows = None
+        if "rows" in event and tab in coercers:
+            rows = coercers[tab](pd.DataFrame(event["rows"]))
+        _enqueue(tab, event["op"], rows=rows, ids=event.get("ids"), seq=event.get("seq") or 0)
+
+
+def next_bet_id() -> int:
+    return st.session_state.max_bet_id + 1
+
+
+def add_bet(values: Dict) -> int:
+    """Validate and append one bet. Raises ValueError on bad input."""
+    bet_id = values.get("id") or next_bet_id()
+    row = validate_bet({**values, "id": bet_id})
+    new = bet_id > st.session_state.max_bet_id
+    st.session_state.max_bet_id = max(st.session_state.max_bet_id, int(bet_id))
+    new_row = _append("bets_df", row)
+    _index_bets(new_row, new=new)
+    if row.get("Status", "Pending") != "Pending":
+        _track_equity([row.get("Date")], [bet_id], [row.get("P/L")])
+    _record("add_bet", st.session_state.bets_tab, "upsert", rows=new_row)
+    _touch(appended=True)
+    return bet_id
+
+
+def settle_bets(results: pd.DataFrame) -> int:
+    """
+    Apply results (columns id, Status and optional Payout for cash-outs) to
+    many bets in one vectorized update. Rows still marked Pending are
+    skipped. Returns the number of bets settled.
+    """
+    results = results[results["Status"] != "Pending"]
+    unknown = set(results["Status"]) - set(STATUSES)
+    if unknown:
+        raise ValueError(f"Unknown status {sorted(unknown)}")
+    if results.empty:
+        return 0
+
+    df = get_bets()
+    lookup = pd.Series(np.arange(len(df)), index=df["id"])
+    lookup = lookup[~lookup.index.duplicated()]
+    pos = lookup.reindex(results["id"]).to_numpy()
+    found = ~np.isnan(pos)
+    pos = pos[found].astype(int)
+    results = results[found]
+
+    stake = df["Stake"].to_numpy()[pos]
+    odds = df["Odds"].to_numpy()[pos]
+    status = results["Status"].to_numpy(str)
+    payout = (
+        pd.to_numeric(results["Payout"], errors="coerce").fillna(0.0).to_numpy(float)
+        if "Payout" in results.columns else np.zeros(len(results))
+    )
+    cashed = status == "Cashed Out"
+    pl = np.select(
+        [status == "Won", status == "Lost", cashed],
+        [stake * odds - stake, -stake, payout - stake],
+        0.0,
+    )
+
+    col = df.columns.get_loc
+    if (df["Status"].to_numpy()[pos] == "Pending").all():
+        _track_equity(df["Date"].to_numpy()[pos], df["id"].to_numpy()[pos], pl)
+    else:
+        st.session_state.equity = None  # re-settling changes history
+    df.iloc[pos, col("Status")] = status
+    df.iloc[pos, col("P/L")] = pl
+    df.iloc[pos[cashed], col("Cashout_Amt")] = payout[cashed]
+
+    _record("settle", st.session_state.bets_tab, "upsert", rows=df.iloc[pos])
+    _touch()
+    return len(pos)
+
+
+def delete_bets(bet_ids: Iterable):
+    bet_ids = set(bet_ids)
+    if not bet_ids:
+        return
+    df = get_bets()
+    _set_frame("bets_df", df[~df["id"].isin(bet_ids)])
+    legs = st.session_state.legs_df
+    st.session_state.legs_df = legs[~legs["bet_id"].isin(bet_ids)]
+    index = st.session_state.get("search_index")
+    if index is not None:
+        for bet_id in bet_ids:
+            index.remove(bet_id)
+    st.session_state.equity = None
+    _record("delete", st.session_state.bets_tab, "delete", ids=bet_ids)
+    _touch()
+
+
+def delete_bet(bet_id: int):
+    delete_bets([bet_id])
+
+
+def add_transaction(values: Dict):
+    """Validate and append one cash transaction. Raises ValueError on bad input."""
+    row = validate_transaction(values)
+    new_row = _append("cash_df", row)
+    _record("transaction", st.session_state.cash_tab, "upsert", rows=new_row)
+    _touch(appended=True)
+
+
+def set_meta(meta_df: pd.DataFrame):
+    st.session_state.meta_df = meta_df
+    _record("config", st.session_state.meta_tab, "replace", rows=meta_df)
+
+
+# ---------------------------------------------------------------------------
+# Sync
+# ---------------------------------------------------------------------------
+def _drain_sync_requests():
+    """
+    Per-rerun bookkeeping for the background queue: hand it full frames for
+    tables the backend could not patch, and refresh the local snapshot once
+    the queue has stored a new batch.
+    """
+    queue = _sync_queue()
+    frames = {
+        st.session_state.bets_tab: get_bets,
+        st.session_state.cash_tab: get_cash,
+        st.session_state.meta_tab: lambda: st.session_state.meta_df,
+    }
+    for table in list(queue.needs_full):
+        if table in frames:
+            # The local frame already holds every journaled event.
+            queue.replace(table, frames[table](), seq=_journal().seq)
+
+    if st.session_state.get("synced_batches") != queue.flushed_batches:
+        st.session_state.synced_batches = queue.flushed_batches
+        if queue.last_synced is not None:
+            st.session_state.last_sync = queue.last_synced.strftime("%H:%M")
+            _save_snapshot()
+    _refresh_unsaved()
+
+
+def sync_status() -> Dict[str, Any]:
+    """Queue state for the sidebar: synced | pending | syncing | failed."""
+    _drain_sync_requests()
+    queue = _sync_queue()
+    return {
+        "status": queue.status,
+        "pending": queue.pending(),
+        "error": queue.last_error,
+        "next_retry": queue.next_retry,
+    }
+
+
 def push_to_cloud():
-    conn = _get_conn()
-    conn.update(worksheet=st.session_state.bets_tab, data=st.session_state.bets_df)
-    conn.update(worksheet=st.session_state.cash_tab, data=st.session_state.cash_df)
-    conn.update(worksheet=st.session_state.meta_tab, data=st.session_state.meta_df)
-    st.session_state.unsaved_count = 0
-    st.session_state.last_sync = datetime.now().strftime("%H:%M")
+    """Flush the write-behind queue now and wait for the result."""
+    queue = _sync_queue()
+    with st.spinner("Saving to cloud..."):
+        for _ in range(2):
+            _drain_sync_requests()
+            ok = queue.flush()
+            if ok or not queue.needs_full:
+                break
+    _drain_sync_requests()
+    if not ok:
+        st.error(f"Sync failed: {queue.last_error or 'timed out'}. Retrying in the background.")
+        return
     st.success("All changes saved to cloud.")
     st.rerun()
@@ -0,0 +1,138 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from data.schema import STATUSES
+
+# Float slack when comparing equity against its running peak.
+EPS = 1e-9
+
+
+@dataclass
+class EquityCurve:
+    """
+    Running state of the settled-bet equity curve (cumulative P/L in Date,
+    id order): peak, drawdown, time under water and losing runs.
+
+    `build` computes it vectorized for loads; `add` folds in one more
+    settled bet in O(1) as long as it sorts after everything seen so far.
+    Anything else (back-dated settlements, edits, deletes) needs a rebuild,
+    which the data layer does lazily on the next read.
+
+    The curve follows the bet Date (placement day), not settlement order:
+    the sheet has no settlement timestamp. Settling an older open bet after
+    a newer one has settled is therefore back-dated and costs a rebuild,
+    roughly 40 ms at 100k bets and 0.4 s at 1M (benchmarks.suite,
+    equity_rebuild).
+    """
+    settled: int = 0
+    equity: float = 0.0
+    peak: float = 0.0
+    peak_date: Optional[pd.Timestamp] = None
+    max_drawdown: float = 0.0
+    underwater_bets: int = 0
+    longest_underwater_bets: int = 0
+    longest_underwater_days: int = 0
+    recoveries: int = 0
+    losing_run: int = 0
+    longest_losing_run: int = 0
+    last_date: Optional[pd.Timestamp] = None
+    last_id: float = -np.inf
+
+    @property
+    def drawdown(self) -> float:
+        return self.peak - self.equity
+
+    def underwater_days(self, today: Optional[date] = None) -> int:
+        """Days since the last peak, 0 when at a high."""
+        if self.drawdown <= EPS or self.peak_date is None:
+            return 0
+        return (pd.Timestamp(today or date.today()) - self.peak_date).days
+
+    def add(self, when, bet_id, pl: float) -> bool:
+        """Fold in one settled bet. False (state untouched) if it is out of order."""
+        when = pd.Timestamp(when).normalize()
+        bet_id = float(bet_id)
+        if pd.isna(when) or (self.last_date is not None and (when, bet_id) < (self.last_date, self.last_id)):
+            return False
+
+        pl = 0.0 if pd.isna(pl) else float(pl)
+        if self.peak_date is None:
+            self.peak_date = when
+        peak_date, was_under = self.peak_date, self.drawdown > EPS
+
+        self.equity += pl
+        under = self.equity < self.peak - EPS
+        if under:
+            self.underwater_bets += 1
+            self.longest_underwater_bets = max(self.longest_underwater_bets, self.underwater_bets)
+        else:
+            self.recoveries += was_under
+            self.peak = max(self.peak, self.equity)
+            self.peak_date = when
+            self.underwater_bets = 0
+        if under or was_under:
+            self.longest_underwater_days = max(self.longest_underwater_days, (when - peak_date).days)
+        self.max_drawdown = max(self.max_drawdown, self.drawdown)
+
+        if pl < 0:
+            self.losing_run += 1
+            self.longest_losing_run = max(self.longest_losing_run, self.losing_run)
+        elif pl > 0:
+            self.losing_run = 0
+
+        self.settled += 1
+        self.last_date, self.last_id = when, bet_id
+        return True
+
+    @classmethod
+    def build(cls, bets: pd.DataFrame) -> "EquityCurve":
+        """Same state as `add` over every settled bet in order, in array ops."""
+        status = pd.Categorical(bets["Status"], categories=STATUSES).codes
+        dates = pd.to_datetime(bets["Date"])
+        settled = bets[(status != STATUSES.index("Pending")) & dates.notna().to_numpy()]
+        if settled.empty:
+            return cls()
+        settled = settled.assign(_date=dates).sort_values(["_date", "id"], kind="stable")
+
+        day = settled["_date"].to_numpy("datetime64[D]")
+        ids = pd.to_numeric(settled["id"], errors="coerce").to_numpy(float)
+        pl = np.nan_to_num(pd.to_numeric(settled["P/L"], errors="coerce").to_numpy(float))
+        n = len(pl)
+        steps = np.arange(n)
+
+        equity = np.cumsum(pl)
+        peak = np.maximum.accumulate(np.maximum(equity, 0.0))
+        under = equity < peak - EPS
+        was_under = np.concatenate([[False], under[:-1]])
+
+        # Index of the latest high at or before each bet; -1 = the 0 start.
+        high = np.maximum.accumulate(np.where(under, -1, steps))
+        peak_day = np.where(high >= 0, day[np.maximum(high, 0)], day[0])
+        prev_peak_day = np.concatenate([day[:1], peak_day[:-1]])
+        spans = (day - prev_peak_day).astype(int)[under | was_under]
+
+        # Losing runs: consecutive losses, pushes neither extend nor break them.
+        moved = pl != 0
+        lost = pl[moved] < 0
+        run_id = np.cumsum(~lost)
+        runs = np.bincount(run_id, weights=lost).astype(int) if lost.size else np.zeros(1, dtype=int)
+
+        return cls(
+            settled=n,
+            equity=float(equity[-1]),
+            peak=float(peak[-1]),
+            peak_date=pd.Timestamp(peak_day[-1]),
+            max_drawdown=float((peak - equity).max()),
+            underwater_bets=int(steps[-1] - high[-1]),
+            longest_underwater_bets=int((steps - high).max() if under.any() else 0),
+            longest_underwater_days=int(spans.max()) if spans.size else 0,
+            recoveries=int((~under & was_under).sum()),
+            losing_run=int(runs[-1]),
+            longest_losing_run=int(runs.max()),
+            last_date=pd.Timestamp(day[-1]),
+            last_id=float(ids[-1]),
+        )
@@ -0,0 +1,129 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from data.cache import CACHE_DIR
+from data.schema import to_storage_frame
+
+
+class Journal:
+    """
+    Append-only JSON-lines log of a user's local mutations, one event per
+    line, fsynced on write. Events carry the same row payloads the sync queue
+    gets and a sequence number. When the queue stores a table it appends an
+    ack up to the sequence it covered, and read() leaves acked events out, so
+    id-less rows (cash) stored before a crash are not appended twice. The
+    log is truncated once the queue has stored everything it holds.
+    """
+
+    def __init__(self, user: str):
+        self.path = CACHE_DIR / f"{user}.journal.jsonl"
+        self._lock = threading.Lock()
+        self.seq = max((e.get("seq") or 0 for e in self._lines()), default=0)
+
+    def _write(self, entry: Dict):
+        line = json.dumps(entry, default=str) + "\n"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _lines(self) -> List[Dict]:
+        if not self.path.exists():
+            return []
+        entries = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    break
+        return entries
+
+    def append(
+        self,
+        event: str,
+        table: str,
+        op: str,
+        rows: Optional[pd.DataFrame] = None,
+        ids: Optional[Iterable] = None,
+    ) -> int:
+        """op is 'upsert', 'delete' or 'replace', as applied by the backend. Returns the event's seq."""
+        entry = {"ts": time.time(), "event": event, "table": table, "op": op}
+        if rows is not None:
+            entry["rows"] = to_storage_frame(rows).to_dict("records")
+        if ids is not None:
+            entry["ids"] = [int(i) for i in ids]
+        with self._lock:
+            self.seq += 1
+            entry["seq"] = self.seq
+            self._write(entry)
+            return self.seq
+
+    def ack(self, table: str, seq: int):
+        """Everything for `table` up to `seq` is stored by the backend."""
+        with self._lock:
+            if self.path.exists():
+                self._write({"ts": time.time(), "table": table, "op": "ack", "seq": seq})
+
+    @staticmethod
+    def _unacked(entries: List[Dict]) -> List[Dict]:
+        acked: Dict[str, int] = {}
+        for e in entries:
+            if e["op"] == "ack":
+                acked[e["table"]] = max(acked.get(e["table"], 0), e["seq"])
+        return [
+            e for e in entries
+            if e["op"] != "ack" and (e.get("seq") or 0) > acked.get(e["table"], -1)
+        ]
+
+    def read(self) -> List[Dict]:
+        """Unacked events in order. A torn last line (crash mid-write) is ignored."""
+        with self._lock:
+            entries = self._lines()
+        return self._unacked(entries)
+
+    def compact(self):
+        """Drop the whole log (the tables it covers were wiped)."""
+        with self._lock:
+            if self.path.exists():
+                self.path.unlink()
+
+    def compact_acked(self):
+        """
+        Truncate once every event is acked. An event appended after the
+        queue drained, but not yet queued, keeps the log alive.
+        """
+        with self._lock:
+            if self.path.exists() and not self._unacked(self._lines()):
+                self.path.unlink()
+
+
+_journals: Dict[str, Journal] = {}
+_journals_lock = threading.Lock()
+
+
+def journal_for(user: str) -> Journal:
+    """The user's journal, shared by their sessions and sync queue so writes share one lock."""
+    with _journals_lock:
+        if user not in _journals:
+            _journals[user] = Journal(user)
+        return _journals[user]
+
+
+def replay(frame: pd.DataFrame, event: Dict, coerce) -> pd.DataFrame:
+    """Apply one journal event to the frame it targets."""
+    op = event["op"]
+    if op == "delete":
+        return frame[~frame["id"].isin(event["ids"])]
+    rows = coerce(pd.DataFrame(event["rows"], columns=frame.columns))
+    if op == "replace":
+        return rows
+    if "id" in frame.columns:
+        frame = frame[~frame["id"].isin(rows["id"])]
+    return pd.concat([frame, rows], ignore_index=True)
@@ -0,0 +1,65 @@
+import json
+
+import pandas as pd
+
+LEG_COLUMNS = ["bet_id", "leg_no", "sport", "league", "event", "odds", "tipster"]
+
+NO_TIPSTER = "— None —"
+
+
+def parse_legs(bets: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalize the `Legs` JSON of parlay rows into one row per leg. This is the
+    only place the JSON is decoded; it runs at load time and once per insert.
+    Rows with missing or malformed legs (not a JSON list of objects) are
+    skipped and stay plain bets; non-object entries in a list are dropped.
+    """
+    if bets.empty or "Legs" not in bets.columns:
+        return pd.DataFrame(columns=LEG_COLUMNS)
+
+    parlays = bets[(bets["Sport"] == "Parlay") & bets["Legs"].astype(bool) & bets["Legs"].notna()]
+    records = []
+    for bet_id, raw in zip(parlays["id"], parlays["Legs"]):
+        try:
+            legs = json.loads(raw)
+        except (TypeError, ValueError):
+            continue
+        if not isinstance(legs, list):
+            continue
+        for leg_no, leg in enumerate(legs):
+            if not isinstance(leg, dict):
+                continue
+            tipster = str(leg.get("tipster") or "")
+            records.append((
+                bet_id,
+                leg_no,
+                leg.get("sport", "Parlay"),
+                leg.get("league", "Multi"),
+                leg.get("event", ""),
+                pd.to_numeric(leg.get("odds"), errors="coerce"),
+                "" if tipster == NO_TIPSTER else tipster,
+            ))
+    return pd.DataFrame.from_records(records, columns=LEG_COLUMNS)
+
+
+def explode_legs(bets: pd.DataFrame, legs: pd.DataFrame) -> pd.DataFrame:
+    """
+    Expand parlays into one row per leg for sport/league analysis. Each leg
+    gets an equal share of the ticket's Stake and P/L; single bets (and
+    parlays without parsed legs) pass through unchanged.
+    """
+    legs = legs[legs["bet_id"].isin(bets["id"])]
+    if legs.empty:
+        return bets
+
+    shares = legs[["bet_id", "sport", "league"]].assign(
+        n_legs=legs.groupby("bet_id")["leg_no"].transform("size")
+    )
+    split = shares.merge(bets, left_on="bet_id", right_on="id", how="inner", sort=False)
+    split["Sport"] = split["sport"]
+    split["League"] = split["league"]
+    split["P/L"] = split["P/L"] / split["n_legs"]
+    split["Stake"] = split["Stake"] / split["n_legs"]
+
+    singles = bets[~bets["id"].isin(legs["bet_id"])]
+    return pd.concat([singles, split[bets.columns]], ignore_index=True)
@@ -0,0 +1,99 @@
+import dataclasses
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Result memory the process-wide analytics cache may hold.
+ANALYTICS_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def approx_nbytes(value: Any) -> int:
+    """Rough memory footprint: array/frame buffers plus containers, not object internals."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(approx_nbytes(k) + approx_nbytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(approx_nbytes(v) for v in value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return approx_nbytes(vars(value))
+    return sys.getsizeof(value)
+
+
+class AnalyticsCache:
+    """
+    Bounded LRU of analytics results, shared by every session in the process.
+    Bounded by entry count and, with `maxbytes`, by the approximate size of
+    the cached values; a value larger than `maxbytes` is not kept.
+    """
+
+    def __init__(self, maxsize: int = 256, maxbytes: Optional[int] = None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+
+        value = compute()
+        size = approx_nbytes(value) if self.maxbytes is not None else 0
+        if self.maxbytes is not None and size > self.maxbytes:
+            return value
+        with self._lock:
+            self.nbytes += size - self._sizes.get(key, 0)
+            self._data[key] = value
+            self._sizes[key] = size
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize or (self.maxbytes is not None and self.nbytes > self.maxbytes):
+                old, _ = self._data.popitem(last=False)
+                self.nbytes -= self._sizes.pop(old)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "bytes": self.nbytes,
+            }
+
+
+def freeze(value: Any) -> Hashable:
+    """Turn filter values (lists, dicts, sets) into a hashable cache-key part."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(freeze(v) for v in value))
+    return value
+
+
+ANALYTICS_CACHE = AnalyticsCache(maxbytes=ANALYTICS_CACHE_BYTES)
@@ -0,0 +1,177 @@
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+BETS_COLUMNS = [
+    "id", "Date", "Sport", "League", "Bookie", "Type",
+    "Event", "Odds", "Stake", "Status", "P/L", "Cashout_Amt",
+    "Legs", "Tipster",
+]
+CASH_COLUMNS = ["Date", "Bookie", "Type", "Amount"]
+META_COLUMNS = ["Sports", "Leagues", "Bookies", "Types", "Tipsters"]
+
+STATUSES = ["Pending", "Won", "Lost", "Push", "Cashed Out"]
+
+# Column -> dtype family. Low-cardinality labels are categoricals; money and
+# odds are float64; ids are int64; dates are day-precision datetime64.
+BETS_DTYPES = {
+    "id": "int",
+    "Date": "date",
+    "Sport": "category",
+    "League": "category",
+    "Bookie": "category",
+    "Type": "category",
+    "Event": "text",
+    "Odds": "float",
+    "Stake": "float",
+    "Status": "status",
+    "P/L": "float",
+    "Cashout_Amt": "float",
+    "Legs": "text",
+    "Tipster": "category",
+}
+CASH_DTYPES = {
+    "Date": "date",
+    "Bookie": "category",
+    "Type": "category",
+    "Amount": "float",
+}
+
+
+def _blank(col: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(col) or pd.api.types.is_datetime64_any_dtype(col):
+        return col.isna()
+    return col.isna() | (col.astype(str).str.strip() == "")
+
+
+def _unreadable(col: pd.Series, bad: pd.Series, what: str) -> ValueError:
+    return ValueError(f"Unreadable {what} in {col.name}: {', '.join(map(repr, col[bad].unique()[:5]))}")
+
+
+def _numbers(col: pd.Series) -> pd.Series:
+    """Numeric values with blanks as NaN. Anything else unparseable raises, since
+    a coerced 0 would be written back over the original cell."""
+    blank = _blank(col)
+    nums = pd.to_numeric(col.where(~blank), errors="coerce")
+    bad = nums.isna() & ~blank
+    if bad.any():
+        raise _unreadable(col, bad, "number(s)")
+    return nums
+
+
+def _coerce_column(col: pd.Series, kind: str) -> pd.Series:
+    if kind == "float":
+        return _numbers(col).fillna(0.0).astype("float64")
+    if kind == "int":
+        ids = _numbers(col)
+        missing = ids.isna()
+        if missing.any():
+            # Rows without an id get fresh ones above the current maximum.
+            start = 0 if missing.all() else int(ids.max())
+            ids[missing] = np.arange(start + 1, start + 1 + int(missing.sum()))
+        return ids.astype("int64")
+    if kind == "date":
+        stamps = pd.to_datetime(col, errors="coerce", format="mixed")
+        bad = stamps.isna() & ~_blank(col)
+        if bad.any():
+            # A NaT would be written back as a blank cell, losing the value.
+            raise _unreadable(col, bad, "date(s)")
+        return stamps.dt.normalize()
+    if kind == "status":
+        labels = col.fillna("").astype(str).replace("", "Pending")
+        # Statuses this app doesn't know are kept, not turned into NaN.
+        extra = sorted(set(labels.unique()) - set(STATUSES))
+        return pd.Categorical(labels, categories=STATUSES + extra)
+    if kind == "category":
+        return col.fillna("").astype(str).astype("category")
+    return col.fillna("").astype(str)
+
+
+def _coerce(df: pd.DataFrame, dtypes: Dict[str, str]) -> pd.DataFrame:
+    df = df.copy()
+    for col, kind in dtypes.items():
+        if col in df.columns:
+            df[col] = _coerce_column(df[col], kind)
+    return df
+
+
+def coerce_bets(df: pd.DataFrame) -> pd.DataFrame:
+    return _coerce(df, BETS_DTYPES)
+
+
+def coerce_cash(df: pd.DataFrame) -> pd.DataFrame:
+    return _coerce(df, CASH_DTYPES)
+
+
+def validate_bet(values: Dict) -> Dict:
+    """Check and normalize one new/edited bet. Raises ValueError on bad input."""
+    out = dict(values)
+    if "Status" in out and out["Status"] not in STATUSES:
+        raise ValueError(f"Unknown status {out['Status']!r}")
+    for col in ["Odds", "Stake", "P/L", "Cashout_Amt"]:
+        if col in out:
+            try:
+                out[col] = float(out[col] if out[col] != "" else 0.0)
+            except (TypeError, ValueError):
+                raise ValueError(f"{col} must be a number, got {out[col]!r}")
+            if not np.isfinite(out[col]):
+                raise ValueError(f"{col} must be finite")
+    if "Odds" in out and out["Odds"] < 1.0:
+        raise ValueError("Odds must be at least 1.0")
+    if "Stake" in out and out["Stake"] < 0:
+        raise ValueError("Stake cannot be negative")
+    if "Date" in out:
+        stamp = pd.to_datetime(out["Date"], errors="coerce")
+        if pd.isna(stamp):
+            raise ValueError(f"Invalid date {out['Date']!r}")
+        out["Date"] = stamp.normalize()
+    return out
+
+
+def validate_transaction(values: Dict) -> Dict:
+    out = dict(values)
+    try:
+        out["Amount"] = float(out["Amount"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Amount must be a number")
+    stamp = pd.to_datetime(out.get("Date"), errors="coerce")
+    if pd.isna(stamp):
+        raise ValueError(f"Invalid date {out.get('Date')!r}")
+    out["Date"] = stamp.normalize()
+    return out
+
+
+def rows_frame(rows: List[Dict], columns: List[str], dtypes: Dict[str, str]) -> pd.DataFrame:
+    """Typed frame of new rows laid out like an existing table."""
+    return _coerce(pd.DataFrame(rows).reindex(columns=columns), dtypes)
+
+
+def concat_typed(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concat same-schema typed frames without degrading categoricals to object."""
+    frames = list(frames)
+    cats = {
+        col: frames[0][col].cat.categories
+        for col in frames[0].columns
+        if isinstance(frames[0][col].dtype, pd.CategoricalDtype)
+    }
+    for col in cats:
+        for f in frames[1:]:
+            cats[col] = cats[col].union(f[col].cat.categories, sort=False)
+    if cats:
+        frames = [
+            f.assign(**{col: f[col].cat.set_categories(c) for col, c in cats.items()})
+            for f in frames
+        ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def to_storage_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Plain object/float frame with ISO dates, for Sheets, SQLite and snapshots."""
+    out = df.copy()
+    for col in out.columns:
+        if isinstance(out[col].dtype, pd.CategoricalDtype):
+            out[col] = out[col].astype(object)
+        elif pd.api.types.is_datetime64_any_dtype(out[col]):
+            out[col] = out[col].dt.strftime("%Y-%m-%d").astype(object)
+    return out
@@ -0,0 +1,85 @@
+import re
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set
+
+import pandas as pd
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text) -> Set[str]:
+    if not isinstance(text, str):
+        return set()
+    return set(_TOKEN.findall(text.lower()))
+
+
+class SearchIndex:
+    """
+    Inverted index of lower-cased tokens -> bet ids over Event, Tipster and
+    each parlay leg's event/tipster. Every query word is matched as a token
+    prefix, and all words must match. The data layer builds it on the first
+    search, then keeps it current on insert/edit/delete instead of
+    rebuilding.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set] = defaultdict(set)
+        self._by_id: Dict[object, Set[str]] = {}
+        self._vocab: List[str] = []  # sorted, for prefix scans
+
+    @classmethod
+    def build(cls, bets: pd.DataFrame, legs: pd.DataFrame) -> "SearchIndex":
+        index = cls()
+        texts = defaultdict(list)
+        for bet_id, event, tipster in zip(bets["id"], bets["Event"], bets["Tipster"]):
+            texts[bet_id] += [event, tipster]
+        for bet_id, event, tipster in zip(legs["bet_id"], legs["event"], legs["tipster"]):
+            texts[bet_id] += [event, tipster]
+        for bet_id, parts in texts.items():
+            index.add(bet_id, parts)
+        return index
+
+    def add(self, bet_id, texts: Iterable):
+        tokens = set().union(*(tokenize(t) for t in texts))
+        self._by_id.setdefault(bet_id, set()).update(tokens)
+        for token in tokens:
+            postings = self._postings[token]
+            if not postings:
+                insort(self._vocab, token)
+            postings.add(bet_id)
+
+    def remove(self, bet_id):
+        for token in self._by_id.pop(bet_id, ()):
+            postings = self._postings[token]
+            postings.discard(bet_id)
+            if not postings:
+                del self._postings[token]
+                pos = bisect_left(self._vocab, token)
+                if pos < len(self._vocab) and self._vocab[pos] == token:
+                    del self._vocab[pos]
+
+    def _prefix_range(self, prefix: str) -> range:
+        lo = hi = bisect_left(self._vocab, prefix)
+        while hi < len(self._vocab) and self._vocab[hi].startswith(prefix):
+            hi += 1
+        return range(lo, hi)
+
+    def search(self, query: str) -> Set:
+        words = tokenize(query)
+        if not words:
+            return set(self._by_id)
+
+        # Expand only the most selective word; the others are checked
+        # against each candidate's own tokens.
+        ranges = {w: self._prefix_range(w) for w in words}
+        cost = {w: sum(len(self._postings[self._vocab[i]]) for i in r) for w, r in ranges.items()}
+        first = min(words, key=cost.get)
+        result = set().union(*(self._postings[self._vocab[i]] for i in ranges[first]))
+        rest = words - {first}
+        if rest:
+            result = {
+                bet_id for bet_id in result
+                if all(any(t.startswith(w) for t in self._by_id[bet_id]) for w in rest)
+            }
+        return result
@@ -0,0 +1,295 @@
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional, Set
+
+import pandas as pd
+
+from data.backends import DeltaUnsupported, StorageBackend
+
+# Wait this long after the first queued change so bursts go out as one batch.
+DEBOUNCE_SECONDS = 2.0
+BACKOFF_BASE_SECONDS = 2.0
+BACKOFF_MAX_SECONDS = 60.0
+
+
+class _TableOps:
+    """Coalesced pending writes for one table."""
+
+    def __init__(self):
+        self.upserts: Dict[object, pd.DataFrame] = {}  # id -> 1-row frame
+        self.deletes: Set = set()
+        self.appends = []  # id-less rows (cash), in order
+        self.replace: Optional[pd.DataFrame] = None
+        self.seq = 0  # highest journal seq folded in
+
+    def __len__(self):
+        return (
+            len(self.upserts) + len(self.deletes) + len(self.appends)
+            + (0 if self.replace is None else 1)
+        )
+
+    def merge_older(self, older: "_TableOps"):
+        """Fold a failed batch back in underneath the changes queued since."""
+        self.seq = max(self.seq, older.seq)
+        if self.replace is not None:
+            return
+        if older.replace is not None:
+            # Row ops queued since stay on top; _apply sends them after it.
+            self.replace = older.replace
+            return
+        for bet_id, row in older.upserts.items():
+            if bet_id not in self.upserts and bet_id not in self.deletes:
+                self.upserts[bet_id] = row
+        self.deletes |= older.deletes - set(self.upserts)
+        self.appends = older.appends + self.appends
+
+
+class SyncQueue:
+    """
+    Write-behind queue in front of a StorageBackend. Mutations enqueue small
+    row payloads and return immediately. A daemon thread flushes them in
+    debounced batches and retries failures with exponential backoff. The
+    thread outlives the Streamlit session, so queued work still reaches the
+    backend if the browser tab goes away; there is one queue per user in the
+    process (see queue_for).
+    """
+
+    def __init__(self, backend: StorageBackend, on_synced: Optional[Callable[[], None]] = None,
+                 on_stored: Optional[Callable[[str, int], None]] = None):
+        self.backend = backend
+        # Called from the worker, under the queue lock, each time it drains.
+        self.on_synced = on_synced
+        # Called from the worker with (table, seq) after a table's writes,
+        # covering journal events up to seq, are stored.
+        self.on_stored = on_stored
+        self.status = "synced"  # synced | pending | syncing | failed
+        self.last_error = ""
+        self.last_synced: Optional[datetime] = None
+        self.next_retry: Optional[float] = None
+        self.flushed_batches = 0
+        # Tables the backend could not patch; the session must enqueue a
+        # full replace for them (see data_layer._drain_sync_requests).
+        self.needs_full: Set[str] = set()
+        # Remote fingerprint per table while the remote is known to hold
+        # nothing this process has not seen; None once that is in doubt.
+        # Seeded on load via expect(); snapshots are stamped with it.
+        self.fingerprints: Dict[str, Optional[str]] = {}
+
+        self._ops: Dict[str, _TableOps] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._flush_now = threading.Event()
+        self._attempt = 0
+        self._inflight = 0
+        self._batches = 0
+        threading.Thread(target=self._run, daemon=True).start()
+
+    # -- enqueue ----------------------------------------------------------
+    def _table(self, table: str) -> _TableOps:
+        return self._ops.setdefault(table, _TableOps())
+
+    def _queued(self):
+        self.status = "pending" if self.status != "failed" else self.status
+        self._idle.clear()
+        self._wake.set()
+
+    def upsert(self, table: str, rows: pd.DataFrame, seq: int = 0):
+        with self._lock:
+            ops = self._table(table)
+            ops.seq = max(ops.seq, seq)
+            if "id" not in rows.columns:
+                ops.appends.append(rows.copy())
+            else:
+                for bet_id, row in zip(rows["id"], (rows.iloc[[i]] for i in range(len(rows)))):
+                    ops.upserts[bet_id] = row.copy()
+                    ops.deletes.discard(bet_id)
+            self._queued()
+
+    def delete(self, table: str, ids: Iterable, seq: int = 0):
+        with self._lock:
+            ops = self._table(table)
+            ops.seq = max(ops.seq, seq)
+            for bet_id in ids:
+                ops.upserts.pop(bet_id, None)
+                ops.deletes.add(bet_id)
+            self._queued()
+
+    def replace(self, table: str, df: pd.DataFrame, seq: int = 0):
+        with self._lock:
+            ops = self._ops[table] = _TableOps()
+            ops.replace = df.copy()
+            ops.seq = seq
+            self.needs_full.discard(table)
+            self._queued()
+
+    def discard(self):
+        """Drop everything queued (e.g. before the tables are wiped)."""
+        with self._lock:
+            self._ops.clear()
+            self.needs_full.clear()
+            self.status = "synced"
+            self._idle.set()
+
+    def expect(self, table: str, fingerprint: Optional[str]):
+        """Record the remote fingerprint of a table whose content was just read or written."""
+        with self._lock:
+            self.fingerprints[table] = fingerprint
+
+    # -- state --------------------------------------------------------------
+    def pending(self) -> int:
+        """Changes not yet confirmed by the backend, including the batch in flight."""
+        with self._lock:
+            return self._inflight + sum(len(ops) for ops in self._ops.values())
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        """
+        Push now instead of waiting for the debounce or a retry backoff.
+        True once everything is stored; False if the next attempt failed, a
+        table needs a full replace, or the timeout ran out.
+        """
+        start = self._batches
+        self._attempt = 0
+        self.next_retry = None
+        self._flush_now.set()
+        self._wake.set()
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self._idle.is_set():
+                return True
+            if self._batches > start and (self.status == "failed" or self.needs_full):
+                return False
+            time.sleep(0.05)
+        return False
+
+    # -- worker -------------------------------------------------------------
+    def _fingerprints(self, tables: Iterable[str]) -> Dict[str, str]:
+        try:
+            return self.backend.fingerprints(tables)
+        except Exception:
+            return {}
+
+    def _unchanged_remote(self) -> Set[str]:
+        """
+        Tables whose remote still matches the fingerprint recorded after the
+        last batch (or load), checked in one call before a batch goes out.
+        Anything else was edited elsewhere and its fingerprint is dropped, so
+        the snapshot is marked stale instead of adopting changes this process
+        never loaded.
+        """
+        if not getattr(self.backend, "is_remote", False):
+            return set()
+        with self._lock:
+            known = {t: fp for t, fp in self.fingerprints.items() if fp is not None}
+        current = self._fingerprints(known) if known else {}
+        unchanged = {t for t, fp in known.items() if current.get(t) == fp}
+        with self._lock:
+            for table in known:
+                if table not in unchanged:
+                    self.fingerprints[table] = None
+        return unchanged
+
+    def _apply(self, table: str, ops: _TableOps):
+        # A replace is the older base image; row ops alongside it are newer.
+        if ops.replace is not None:
+            self.backend.replace(table, ops.replace)
+        if ops.deletes:
+            self.backend.delete(table, ops.deletes)
+        if ops.upserts:
+            self.backend.upsert(table, pd.concat(ops.upserts.values(), ignore_index=True))
+        if ops.appends:
+            self.backend.upsert(table, pd.concat(ops.appends, ignore_index=True))
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            # Debounce only the first attempt; retries wait for their backoff.
+            if self._attempt == 0:
+                self._flush_now.wait(DEBOUNCE_SECONDS)
+            self._wake.clear()
+            self._flush_now.clear()
+
+            with self._lock:
+                batch, self._ops = self._ops, {}
+                self._inflight = sum(len(ops) for ops in batch.values())
+            if not batch:
+                if not self.needs_full:
+                    self._idle.set()
+                continue
+
+            self.status = "syncing"
+            unchanged = self._unchanged_remote()
+            # Confirmed unchanged since our last write: no need to re-read ids.
+            self.backend.trust(unchanged & set(batch))
+            failed = {}
+            for table, ops in batch.items():
+                try:
+                    self._apply(table, ops)
+                    if self.on_stored is not None and ops.seq:
+                        self.on_stored(table, ops.seq)
+                except DeltaUnsupported:
+                    self.needs_full.add(table)
+                except Exception as e:
+                    self.last_error = str(e) or e.__class__.__name__
+                    failed[table] = ops
+            self.backend.trust(())
+            # Only this batch touched the remote: advance to its new fingerprints,
+            # which are the baseline the next batch is checked against.
+            # (A Sheets fingerprint moves for every tab when any tab is written.)
+            clean = not failed and not (self.needs_full & set(batch))
+            advanced = self._fingerprints(unchanged) if clean and unchanged else {}
+
+            with self._lock:
+                self._inflight = 0
+                self._batches += 1
+                for table in unchanged:
+                    self.fingerprints[table] = advanced.get(table)
+                for table, ops in failed.items():
+                    self._table(table).merge_older(ops)
+                if failed:
+                    self._attempt += 1
+                    self.status = "failed"
+                    delay = min(BACKOFF_BASE_SECONDS * 2 ** (self._attempt - 1), BACKOFF_MAX_SECONDS)
+                    self.next_retry = time.time() + delay
+                elif self._ops or self.needs_full:
+                    self._attempt = 0
+                    self.status = "pending"
+                else:
+                    self._attempt = 0
+                    self.status = "synced"
+                    self.last_error = ""
+                    self.next_retry = None
+                    self.last_synced = datetime.now()
+                    self.flushed_batches += 1
+                    if self.on_synced is not None:
+                        self.on_synced()
+                    self._idle.set()
+
+            if failed:
+                # Sleep out the backoff unless flush() asks for an immediate retry.
+                self._wake.wait(max(self.next_retry - time.time(), 0))
+                self._wake.set()
+
+
+_queues: Dict[str, SyncQueue] = {}
+_queues_lock = threading.Lock()
+
+
+def has_queue(user: str) -> bool:
+    with _queues_lock:
+        return user in _queues
+
+
+def queue_for(
+    user: str,
+    make_backend: Callable[[], StorageBackend],
+    on_synced: Optional[Callable[[], None]] = None,
+    on_stored: Optional[Callable[[str, int], None]] = None,
+) -> SyncQueue:
+    """The user's queue, shared by all of their sessions in this process."""
+    with _queues_lock:
+        if user not in _queues:
+            _queues[user] = SyncQueue(make_backend(), on_synced=on_synced, on_stored=on_stored)
+        return _queues[user]
@@ -0,0 +1,158 @@
+"""
+Opt-in per-rerun timings.
+
+Turn on with `?profile=1` in the URL or in secrets:
+
+    [debug]
+    profiling = true
+    profile_log = "profile.jsonl"   # optional: append every rerun here
+
+Wrap hot paths in `with timer("name"):` or decorate them with `@timed()`.
+When profiling is off both are no-ops apart from one session_state lookup.
+Declare fragments with `@profiling.fragment("name")` so their own reruns,
+which skip app.py, are recorded too.
+"""
+import functools
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Optional
+
+import pandas as pd
+import streamlit as st
+
+HISTORY_RUNS = 50
+
+
+def _debug_secrets() -> dict:
+    try:
+        return dict(st.secrets.get("debug", {}))
+    except Exception:
+        return {}
+
+
+def enabled() -> bool:
+    return st.session_state.get("profiling", False)
+
+
+def record(name: str, seconds: float):
+    """Add a duration measured elsewhere (e.g. on a worker thread) to this rerun."""
+    if not enabled():
+        return
+    calls = st.session_state.profile_run.setdefault(name, [0, 0.0])
+    calls[0] += 1
+    calls[1] += seconds
+
+
+@contextmanager
+def timer(name: str):
+    if not enabled():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def timed(name: Optional[str] = None) -> Callable:
+    def decorate(fn: Callable) -> Callable:
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timer(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def start_run():
+    """Call at the top of app.py; decides whether this rerun is profiled."""
+    if "profiling" not in st.session_state:
+        st.session_state.profiling = (
+            st.query_params.get("profile") == "1" or bool(_debug_secrets().get("profiling"))
+        )
+    if enabled():
+        _open_run()
+
+
+def _open_run(scope: Optional[str] = None):
+    st.session_state.profile_run = {}
+    st.session_state.profile_start = time.perf_counter()
+    st.session_state.profile_scope = scope
+
+
+def end_run():
+    """Close the rerun: keep it in the session history and the optional log."""
+    if not enabled():
+        return
+    scope = st.session_state.pop("profile_scope", None)
+    page = st.session_state.get("selected_page")
+    run = {
+        "at": datetime.now().isoformat(timespec="seconds"),
+        "page": f"{page} · {scope}" if scope else page,
+        "total": time.perf_counter() - st.session_state.profile_start,
+        "timers": {name: {"calls": c, "seconds": s} for name, (c, s) in st.session_state.profile_run.items()},
+    }
+    if "profile_history" not in st.session_state:
+        st.session_state.profile_history = deque(maxlen=HISTORY_RUNS)
+    st.session_state.profile_history.append(run)
+
+    log = _debug_secrets().get("profile_log")
+    if log:
+        with open(log, "a", encoding="utf-8") as f:
+            f.write(json.dumps(run) + "\n")
+
+
+@contextmanager
+def run_scope(name: str):
+    """
+    Time a fragment body. During a full rerun it is one more timer; a
+    fragment rerun skips app.py's start_run/end_run, so there it opens and
+    closes a run of its own.
+    """
+    if not enabled() or "profile_scope" in st.session_state:
+        with timer(name):
+            yield
+        return
+    _open_run(name)
+    try:
+        with timer(name):
+            yield
+    finally:
+        end_run()
+
+
+def fragment(name: str, **kwargs) -> Callable:
+    """`st.fragment` whose body runs in run_scope(name)."""
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def body(*args, **kw):
+            with run_scope(name):
+                return fn(*args, **kw)
+        return st.fragment(body, **kwargs)
+    return decorate
+
+
+def render_panel(container):
+    """Debug panel with the last rerun's timers, filled in after the page ran."""
+    if not enabled() or not st.session_state.get("profile_history"):
+        return
+    history = list(st.session_state.profile_history)
+    last = history[-1]
+    with container.expander(f"⏱ Profile · {last['total'] * 1000:.0f} ms", expanded=False):
+        rows = pd.DataFrame(
+            [(name, t["calls"], t["seconds"] * 1000) for name, t in last["timers"].items()],
+            columns=["Timer", "Calls", "ms"],
+        ).sort_values("ms", ascending=False)
+        st.dataframe(rows, hide_index=True, use_container_width=True,
+                     column_config={"ms": st.column_config.NumberColumn(format="%.1f")})
+        st.caption(f"Last {len(history)} reruns: " + ", ".join(f"{r['total'] * 1000:.0f}" for r in history[-10:]) + " ms")
+        st.download_button(
+            "Export JSON", json.dumps(history, indent=2), file_name="sharptracker_profile.json",
+            mime="application/json", use_container_width=True,
+        )
@@ -0,0 +1,57 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from data import journal, sync
+from data.backends import SQLiteBackend
+from data.schema import BETS_COLUMNS, CASH_COLUMNS, META_COLUMNS
+
+APP = str(Path(__file__).resolve().parents[1] / "app.py")
+USER = "alice"
+
+
+def bet(bet_id: int, **values) -> dict:
+    row = {
+        "id": bet_id, "Date": "2024-01-01", "Sport": "Soccer", "League": "EPL", "Bookie": "B365",
+        "Type": "Main", "Event": f"Event {bet_id}", "Odds": 2.0, "Stake": 10.0, "Status": "Won",
+        "P/L": 10.0, "Cashout_Amt": 0.0, "Legs": "", "Tipster": "",
+    }
+    return {**row, **values}
+
+
+def restart():
+    """What a server restart leaves behind: no queues, no open journals."""
+    sync._queues.clear()
+    journal._journals.clear()
+
+
+def session(page: str, backend=None) -> AppTest:
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.session_state.authenticated = True
+    at.session_state.username = USER
+    at.session_state.selected_page = page
+    if backend is not None:
+        at.session_state.backend = backend
+    return at
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A SQLite backend seeded with one settled bet, in a throwaway cwd."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sync, "DEBOUNCE_SECONDS", 0.05)
+    restart()
+    backend = SQLiteBackend(str(tmp_path / "t.db"))
+    backend.replace(f"bets_{USER}", pd.DataFrame([bet(1)], columns=BETS_COLUMNS))
+    backend.replace(f"cash_{USER}", pd.DataFrame(columns=CASH_COLUMNS))
+    backend.replace(f"meta_{USER}", pd.DataFrame(
+        {"Sports": ["Soccer"], "Leagues": ["EPL"], "Bookies": ["B365"], "Types": ["Main"], "Tipsters": [""]},
+        columns=META_COLUMNS,
+    ))
+    yield backend
+    # Queue threads outlive the test; let them finish before the next one.
+    for queue in list(sync._queues.values()):
+        queue.flush(timeout=2)
+    restart()
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from data.analytics import simulate_bankroll
+
+
+def _settled(status, n=20, odds=2.0, stake=10.0):
+    pl = stake * (odds - 1) if status == "Won" else -stake
+    return pd.DataFrame({"Status": [status] * n, "Odds": [odds] * n, "Stake": [stake] * n, "P/L": [pl] * n})
+
+
+def test_simulation_every_bet_wins():
+    # Odds 2.0 at p=1: every path gains the stake on every bet.
+    sim = simulate_bankroll(_settled("Won"), 100.0, horizon=30, paths=1000, seed=0)
+    assert sim.risk_of_ruin == 0.0
+    assert sim.expected_drawdown == sim.drawdown_p95 == 0.0
+    assert sim.median_final == sim.mean_final == 400.0
+    expected = 100.0 + 10.0 * sim.bands.index.to_numpy()
+    for col in sim.bands.columns:
+        np.testing.assert_allclose(sim.bands[col], expected)
+
+
+def test_simulation_every_bet_loses():
+    sim = simulate_bankroll(_settled("Lost"), 100.0, horizon=30, paths=1000, seed=0)
+    assert sim.risk_of_ruin == 1.0
+    assert sim.median_final == sim.mean_final == 0.0
+    assert sim.expected_drawdown == 100.0
+    bands = sim.bands
+    np.testing.assert_allclose(bands.loc[bands.index >= 10].to_numpy(), 0.0)
+
+
+def test_implied_odds_is_a_no_edge_baseline():
+    sim = simulate_bankroll(_settled("Won"), 1000.0, horizon=250, paths=10_000, method="implied", seed=0)
+    assert sim.risk_of_ruin == 0.0
+    assert abs(sim.mean_final - 1000.0) < 10
+    assert abs(sim.bands["p50"].iloc[-1] - 1000.0) <= 20
@@ -0,0 +1,32 @@
+from streamlit.testing.v1 import AppTest
+
+from conftest import USER
+
+
+def _log_two_bets():
+    import streamlit as st
+    from data.data_layer import add_bet, bet_counters, get_bets, init_user_data
+
+    init_user_data(st.session_state.username)
+    for stake, status, pl in [(10.0, "Lost", -10.0), (5.0, "Pending", 0.0)]:
+        add_bet({"Date": "2024-02-01", "Sport": "Soccer", "League": "EPL", "Bookie": "B365", "Type": "Main",
+                 "Event": "C v D", "Odds": 2.0, "Stake": stake, "Status": status, "P/L": pl,
+                 "Cashout_Amt": 0.0, "Legs": "", "Tipster": ""})
+    st.session_state.buffered = len(st.session_state.bets_df_pending)
+    st.session_state.counters = bet_counters()
+    st.session_state.ids = get_bets()["id"].tolist()
+
+
+def test_inserts_stay_buffered_and_counted(db):
+    at = AppTest.from_function(_log_two_bets, default_timeout=60)
+    at.session_state.username = USER
+    at.session_state.backend = db
+    at.run()
+    assert not at.exception
+    assert at.session_state.buffered == 2
+    counters = at.session_state.counters
+    assert counters["total_bets"] == 3
+    assert counters["net_pl"] == 0.0
+    assert counters["open_risk"] == 5.0
+    assert counters["accuracy_pct"] == 50.0
+    assert at.session_state.ids == [1, 2, 3]
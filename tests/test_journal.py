@@ -0,0 +1,58 @@
+import time
+
+import pandas as pd
+
+from conftest import USER, restart, session
+from data import data_layer
+from data.backends import SQLiteBackend
+from data.journal import Journal
+from data.schema import BETS_COLUMNS
+
+
+class FailingBets(SQLiteBackend):
+    def upsert(self, table, rows):
+        if table.startswith("bets_"):
+            raise RuntimeError("bets down")
+        super().upsert(table, rows)
+
+
+def _remote_bets(db) -> int:
+    return len(SQLiteBackend(db.path).load(f"bets_{USER}", BETS_COLUMNS))
+
+
+def test_journaled_bet_is_requeued_and_synced_after_restart(db, monkeypatch):
+    monkeypatch.setattr(data_layer, "backend_from_secrets", lambda: FailingBets(db.path))
+    at = session("Wagers")
+    at.run()
+    next(b for b in at.button if b.label == "Log Locally").click().run()
+    assert not at.exception
+    assert not at.session_state.sync_queue.flush(timeout=5)
+    assert _remote_bets(db) == 1
+
+    restart()
+    monkeypatch.setattr(data_layer, "backend_from_secrets", lambda: SQLiteBackend(db.path))
+    at = session("Dashboard")
+    at.run()
+    assert not at.exception
+    assert len(at.session_state.bets_df) == 2
+    assert at.session_state.unsaved_count > 0
+
+    assert at.session_state.sync_queue.flush(timeout=5)
+    assert _remote_bets(db) == 2
+    deadline = time.time() + 5
+    while Journal(USER).path.exists() and time.time() < deadline:
+        time.sleep(0.05)
+    assert not Journal(USER).path.exists()
+
+
+def test_compaction_keeps_events_not_yet_queued(db):
+    log = Journal(USER)
+    first = log.append("add_cash", f"cash_{USER}", "upsert", rows=pd.DataFrame([{"Amount": 1.0}]))
+    log.ack(f"cash_{USER}", first)
+    pending = log.append("add_cash", f"cash_{USER}", "upsert", rows=pd.DataFrame([{"Amount": 2.0}]))
+    log.compact_acked()
+    assert [e["seq"] for e in log.read()] == [pending]
+
+    log.ack(f"cash_{USER}", pending)
+    log.compact_acked()
+    assert not log.path.exists()
@@ -0,0 +1,23 @@
+import pandas as pd
+import pytest
+
+from data.schema import STATUSES, coerce_bets, coerce_cash
+
+
+def test_unreadable_cells_are_refused_not_zeroed():
+    for column, value in [("Stake", "ten"), ("Odds", "n/a"), ("id", "x"), ("Date", "yesterday")]:
+        with pytest.raises(ValueError, match=column):
+            coerce_bets(pd.DataFrame({column: ["1", value]}))
+
+
+def test_blank_cells():
+    bets = coerce_bets(pd.DataFrame({
+        "id": [3, "", None, "7"], "Stake": ["2.5", "", None, 4], "Date": ["2024-01-02", "", None, "2024-01-05"],
+        "Status": ["Won", "Void", None, ""],
+    }))
+    assert bets["id"].tolist() == [3, 8, 9, 7]
+    assert bets["Stake"].tolist() == [2.5, 0.0, 0.0, 4.0]
+    assert bets["Date"].isna().tolist() == [False, True, True, False]
+    assert bets["Status"].tolist() == ["Won", "Void", "Pending", "Pending"]
+    assert list(bets["Status"].cat.categories) == STATUSES + ["Void"]
+    assert coerce_cash(pd.DataFrame({"Amount": [None, "1"]}))["Amount"].tolist() == [0.0, 1.0]
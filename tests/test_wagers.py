@@ -0,0 +1,22 @@
+import pandas as pd
+
+from conftest import USER, bet, session
+from data.schema import BETS_COLUMNS
+
+
+def test_history_shows_bets_without_a_date(db):
+    db.replace(f"bets_{USER}", pd.DataFrame([bet(1), bet(2, Date="")], columns=BETS_COLUMNS))
+    at = session("Wagers", backend=db)
+    at.run()
+    next(t for t in at.text_input if t.label == "Search").set_value("Event 2").run()
+    assert not at.exception
+    assert any(e.label.startswith("No date |") for e in at.expander)
+
+
+def test_search_index_is_built_on_first_search(db):
+    at = session("Wagers", backend=db)
+    at.run()
+    assert at.session_state.search_index is None
+    next(t for t in at.text_input if t.label == "Search").set_value("event 1").run()
+    assert not at.exception
+    assert at.session_state.search_index.search("event 1") == {1}
@@ -1,11 +1,17 @@
 import streamlit as st
-import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
 from datetime import date
 
+from data.analytics import balance_series, liquidity_summary, simulate_bankroll
+from data.data_layer import add_transaction, cached_analytics, get_bets, get_cash
+from profiling import timer
+from views.charts import cached_figure
+
 
 def render_bankroll():
-    df_bets = st.session_state.bets_df
-    df_cash = st.session_state.cash_df
+    df_bets = get_bets()
+    df_cash = get_cash()
     df_meta = st.session_state.meta_df
 
     st.title("Bankroll Intelligence")
@@ -20,41 +26,45 @@ def render_bankroll():
         submitted = st.form_submit_button("Record Transaction")
         if submitted:
             v = -tx_a if tx_t == "Withdrawal" else tx_a
-            new_tx = pd.DataFrame(
-                [[date.today(), tx_b, tx_t, v]],
-                columns=["Date", "Bookie", "Type", "Amount"],
-            )
-            st.session_state.cash_df = pd.concat(
-                [df_cash, new_tx], ignore_index=True
-            )
-            st.session_state.unsaved_count += 1
+            try:
+                add_transaction(
+                    {"Date": date.today(), "Bookie": tx_b, "Type": tx_t, "Amount": v}
+                )
+            except ValueError as e:
+                st.error(f"Transaction not recorded: {e}")
+                st.stop()
             st.success("Transaction recorded locally.")
             st.rerun()
 
     # --- Summary ---
     st.subheader("Liquidity Summary")
 
-    summary_rows = []
-    for b in df_meta["Bookies"].dropna().unique():
-        net_c = df_cash[df_cash["Bookie"] == b]["Amount"].sum()
-        net_p = df_bets[df_bets["Bookie"] == b]["P/L"].sum()
-        risk = df_bets[
-            (df_bets["Bookie"] == b) & (df_bets["Status"] == "Pending")
-        ]["Stake"].sum()
-        summary_rows.append(
-            {
-                "Bookie": b,
-                "Net Cash": net_c,
-                "Total P/L": net_p,
-                "Balance (incl. open risk)": net_c + net_p - risk,
-            }
-        )
+    bookies = tuple(df_meta["Bookies"].dropna().unique())
+    summary = cached_analytics(
+        "liquidity", lambda: liquidity_summary(df_bets, df_cash, bookies), bookies
+    )
 
-    if summary_rows:
-        st.table(pd.DataFrame(summary_rows))
+    if not summary.empty:
+        st.table(summary)
     else:
         st.info("No liquidity data yet. Record deposits/withdrawals above.")
 
+    # --- Balance history ---
+    series = cached_analytics("balance_series", lambda: balance_series(df_bets, df_cash))
+    if not series.empty:
+        st.markdown("#### Balance Over Time")
+        with timer("chart:balance"):
+            fig = cached_figure("balance", lambda: px.line(
+                series, x=series.index, y=series.columns,
+                labels={"value": "Balance", "variable": "Bookie"},
+            ), series, dict(template="plotly_dark", height=320, margin=dict(t=20, b=20, l=20, r=20)))
+            st.plotly_chart(fig, use_container_width=True)
+
+    # --- Projection ---
+    st.markdown("#### Bankroll Projection")
+    start = float(summary["Net Cash"].sum() + summary["Total P/L"].sum()) if not summary.empty else 0.0
+    _render_projection(df_bets, max(start, 0.0))
+
     # --- Ledger ---
     st.markdown("#### Raw Cashflow Ledger")
     if df_cash.empty:
@@ -64,3 +74,54 @@ def render_bankroll():
             df_cash.sort_values("Date", ascending=False),
             use_container_width=True,
         )
+
+
+def _render_projection(df_bets, start):
+    with st.form("sim_f"):
+        s1, s2, s3, s4 = st.columns(4)
+        bankroll = s1.number_input("Starting bankroll", 0.0, value=start, step=100.0)
+        horizon = s2.number_input("Future bets", 10, 5000, 250, step=50)
+        paths = s3.selectbox("Paths", [10_000, 50_000, 100_000])
+        method = s4.selectbox("Model", ["Bootstrap history", "Implied odds"])
+        if st.form_submit_button("Simulate"):
+            st.session_state.sim_params = (bankroll, int(horizon), paths, method)
+
+    if "sim_params" not in st.session_state:
+        st.caption("Resamples your settled bets to project where the bankroll could go next.")
+        return
+    bankroll, horizon, paths, method = st.session_state.sim_params
+    kind = "implied" if method == "Implied odds" else "bootstrap"
+    with st.spinner("Simulating..."):
+        sim = cached_analytics(
+            "simulation", lambda: simulate_bankroll(df_bets, bankroll, horizon, paths, kind, seed=0),
+            st.session_state.sim_params,
+        )
+    if sim is None:
+        st.info("Settle a few bets first; the simulation samples from your history.")
+        return
+
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Risk of Ruin", f"{sim.risk_of_ruin:.1%}")
+    m2.metric("Median Final", f"${sim.median_final:,.0f}", f"${sim.median_final - sim.bankroll:,.0f}")
+    m3.metric("Expected Drawdown", f"${sim.expected_drawdown:,.0f}")
+    m4.metric("Drawdown (95th pct)", f"${sim.drawdown_p95:,.0f}")
+
+    bands = sim.bands
+    x = bands.index.to_numpy()
+
+    def build():
+        fig = go.Figure()
+        for lo, hi, alpha in [("p5", "p95", 0.15), ("p25", "p75", 0.3)]:
+            fig.add_trace(go.Scatter(x=x, y=bands[hi], line=dict(width=0), showlegend=False, hoverinfo="skip"))
+            fig.add_trace(go.Scatter(
+                x=x, y=bands[lo], fill="tonexty", line=dict(width=0),
+                fillcolor=f"rgba(0,255,200,{alpha})", name=f"{lo[1:]}–{hi[1:]}th pct",
+            ))
+        fig.add_trace(go.Scatter(x=x, y=bands["p50"], line=dict(color="#00ffc8", width=2), name="Median"))
+        return fig
+    fig = cached_figure("simulation", build, bands, dict(
+        template="plotly_dark", height=340, xaxis_title="Bets placed", yaxis_title="Bankroll",
+        margin=dict(t=20, b=20, l=20, r=20),
+    ))
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption(f"{sim.paths:,} simulated paths over {sim.horizon:,} bets, flat stakes as in your history.")
@@ -0,0 +1,51 @@
+import hashlib
+import json
+from typing import Any, Callable, Dict
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from data.memo import AnalyticsCache
+
+# Serialized figure JSON, shared by every session in the process.
+FIGURE_CACHE = AnalyticsCache(maxsize=128)
+
+
+def _feed(h, value: Any):
+    if isinstance(value, (pd.Series, pd.DataFrame, pd.Index)):
+        h.update(pd.util.hash_pandas_object(value, index=not isinstance(value, pd.Index)).to_numpy().tobytes())
+        if isinstance(value, pd.Series):
+            _feed(h, value.index)
+    elif isinstance(value, np.ndarray):
+        h.update(str(value.dtype).encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        for k in sorted(value, key=str):
+            _feed(h, k)
+            _feed(h, value[k])
+    elif isinstance(value, (list, tuple)):
+        h.update(b"[")
+        for v in value:
+            _feed(h, v)
+        h.update(b"]")
+    else:
+        h.update(repr(value).encode())
+
+
+def fingerprint(*parts: Any) -> str:
+    h = hashlib.sha1()
+    for part in parts:
+        _feed(h, part)
+    return h.hexdigest()
+
+
+def cached_figure(kind: str, build: Callable[[], go.Figure], data: Any, layout: Dict) -> Dict:
+    """
+    Figure spec as a plain dict for st.plotly_chart. `build` runs only when
+    no figure of this kind was made from the same data and layout; otherwise
+    the stored JSON is reused, skipping plotly.express entirely.
+    """
+    key = (kind, fingerprint(data, layout))
+    spec = FIGURE_CACHE.get_or_compute(key, lambda: build().update_layout(**layout).to_json())
+    return json.loads(spec)
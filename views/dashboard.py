@@ -1,194 +1,335 @@
+import os
+
 import streamlit as st
-import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
-from datetime import datetime, timedelta
-import json
-
-
-def _period_stats(df, days_back):
-    cutoff = datetime.now().date() - timedelta(days=days_back)
-    period_df = df[df["Date"] >= cutoff]
-    if period_df.empty:
-        return {"bets": 0, "pl": 0, "roi": 0, "hit_rate": 0, "turnover": 0}
-    total_bets = len(period_df)
-    net_pl = pd.to_numeric(period_df["P/L"]).sum()
-    turnover = pd.to_numeric(period_df["Stake"]).sum()
-    graded = period_df[period_df["Status"].isin(["Won", "Lost"])]
-    won = len(graded[graded["Status"] == "Won"])
-    lost = len(graded[graded["Status"] == "Lost"])
-    hit_rate = (won / (won + lost) * 100) if (won + lost) > 0 else 0
-    roi = (net_pl / turnover * 100) if turnover > 0 else 0
-    return {"bets": total_bets, "pl": net_pl, "roi": roi, "hit_rate": hit_rate, "turnover": turnover}
-
-
-def get_streak_stats(df):
-    if df.empty:
-        return "N/A", "#8b949e"
-    graded = df[df["Status"].isin(["Won", "Lost"])].sort_values(["Date", "id"], ascending=False)
-    if graded.empty:
-        return "0-0", "#8b949e"
-    res = graded["Status"].tolist()
-    curr, count = res[0], 0
-    for r in res:
-        if r == curr:
-            count += 1
-        else:
-            break
-    color = "#00ffc8" if curr == "Won" else "#ff4b4b"
-    return f"{count} {curr}", color
-
-
-def basic_counters(df):
-    if df.empty:
-        return {"total_bets": 0, "net_pl": 0, "open_risk": 0, "accuracy_pct": 0, "roi_pct": 0, "turnover": 0}
-    total_bets = len(df)
-    net_pl = pd.to_numeric(df["P/L"]).sum()
-    open_risk = pd.to_numeric(df[df["Status"] == "Pending"]["Stake"]).sum()
-    turnover = pd.to_numeric(df["Stake"]).sum()
-    graded = df[df["Status"].isin(["Won", "Lost"])]
-    won = len(graded[graded["Status"] == "Won"])
-    lost = len(graded[graded["Status"] == "Lost"])
-    accuracy_pct = (won / (won + lost) * 100) if (won + lost) > 0 else 0
-    roi_pct = (net_pl / turnover * 100) if turnover > 0 else 0
-    return {"total_bets": total_bets, "net_pl": net_pl, "open_risk": open_risk,
-            "accuracy_pct": accuracy_pct, "roi_pct": roi_pct, "turnover": turnover}
-
-
-def _explode_for_sport_analysis(df):
-    """
-    Expand parlay legs into individual rows for sport/league chart analysis.
-    Each leg gets proportional P/L (total P/L / number of legs).
-    Regular single bets pass through unchanged.
-    """
-    rows = []
-    for _, row in df.iterrows():
-        if row.get("Sport") == "Parlay" and row.get("Legs"):
-            try:
-                legs = json.loads(row["Legs"])
-                if legs:
-                    leg_pl = float(row["P/L"]) / len(legs)
-                    leg_stake = float(row["Stake"]) / len(legs)
-                    for leg in legs:
-                        r = row.copy()
-                        r["Sport"] = leg.get("sport", "Parlay")
-                        r["League"] = leg.get("league", "Multi")
-                        r["P/L"] = leg_pl
-                        r["Stake"] = leg_stake
-                        rows.append(r)
-                    continue
-            except Exception:
-                pass
-        rows.append(row)
-    return pd.DataFrame(rows)
+from datetime import date
 
+from data.analytics import (
+    ODDS_BUCKETS, PROB_BUCKETS, bootstrap_ci, calibration, compute_metrics, downsample_minmax, resample_closes,
+)
+from data.data_layer import cached_analytics, equity_curve, get_bets
+from data.equity import EquityCurve
+from data.legs import explode_legs
+from data.memo import freeze
+import profiling
+from profiling import timed
+from views.charts import cached_figure
 
-def render_dashboard():
-    df_bets = st.session_state.bets_df.copy()
-    st.title("Performance Intelligence")
+BREAKDOWN_LAYOUT = dict(height=280, margin=dict(t=30, b=10, l=10, r=10))
+GROWTH_LAYOUT = dict(template="plotly_dark", height=380, margin=dict(t=20, b=20, l=20, r=20))
+GROWTH_RESOLUTIONS = {"Per bet": None, "Daily": "D", "Weekly": "W"}
+GROWTH_BUDGETS = [500, 1000, 2000, 5000, "All"]
+WEBGL_POINTS = 5000  # switch the trace to WebGL above this many points
+CI_GROUPS = ["Sport", "League", "Bookie", "Type", "Tipster"]
+CI_SHOWN = 12
+CI_WORKERS = min(4, os.cpu_count() or 1)
+CALIBRATION_MODES = {"Odds": ("odds", ODDS_BUCKETS), "Implied probability": ("implied", PROB_BUCKETS)}
 
-    df_filtered = df_bets.copy()
 
-    with st.expander("🔍 Filters", expanded=False):
-        col1, col2, col3 = st.columns(3)
-        bookie_f = col1.multiselect("Bookie", sorted(df_bets["Bookie"].dropna().unique()))
-        type_f = col2.multiselect("Bet Type", sorted(df_bets["Type"].dropna().unique()))
-        sport_f = col3.multiselect("Sport", sorted(df_bets["Sport"].dropna().unique()))
-        if bookie_f:
-            df_filtered = df_filtered[df_filtered["Bookie"].isin(bookie_f)]
-        if type_f:
-            df_filtered = df_filtered[df_filtered["Type"].isin(type_f)]
-        if sport_f:
-            df_filtered = df_filtered[df_filtered["Sport"].isin(sport_f)]
-
-    if df_filtered.empty:
-        st.info("Log your first bet to activate analytics.")
-        return
+def _filter_options(df):
+    return {col: sorted(df[col].dropna().unique()) for col in ["Bookie", "Type", "Sport"]}
+
+
+def _apply_filters(df, filters):
+    for col, selected in filters.items():
+        if selected:
+            df = df[df[col].isin(selected)]
+    return df
+
+
+def _aggregate(df, legs, filters):
+    """Everything the dashboard draws, computed once per data version + filter set."""
+    df = _apply_filters(df, filters)
+    if df.empty:
+        return None
 
     # Exploded df for sport/league charts (parlays split into legs)
-    df_exploded = _explode_for_sport_analysis(df_filtered)
+    df_exploded = explode_legs(df, legs)
+    df_growth = df.sort_values("Date")
+    return {
+        "metrics": compute_metrics(df),
+        "sport_pl": df_exploded.groupby("Sport", observed=True)["P/L"].sum().sort_values(ascending=False).head(8),
+        "bookie_stake": df.groupby("Bookie", observed=True)["Stake"].sum().sort_values(ascending=False).head(6),
+        "type_pl": df.groupby("Type", observed=True)["P/L"].sum(),
+        "league_pl": df_exploded.groupby("League", observed=True)["P/L"].sum().sort_values(ascending=False).head(8),
+        "growth_x": df_growth["Date"],
+        "growth_y": df_growth["P/L"].cumsum(),
+    }
 
-    today_s = _period_stats(df_filtered, 1)
-    week_s = _period_stats(df_filtered, 7)
-    month_s = _period_stats(df_filtered, 30)
-    total_s = basic_counters(df_filtered)
+
+def _render_metrics(metrics):
+    total_s = metrics.total
 
     # Period row
     st.markdown("### 📅 By Period")
-    r1, r2, r3, r4 = st.columns(4)
-    r1.metric("Today", f"{today_s['bets']} bets", f"${today_s['pl']:,.0f}")
-    r2.metric("Week", f"{week_s['bets']} bets", f"${week_s['pl']:,.0f}")
-    r3.metric("Month", f"{month_s['bets']} bets", f"${month_s['pl']:,.0f}")
-    r4.metric("Total", f"{total_s['total_bets']} bets", f"${total_s['net_pl']:,.0f}")
+    for col, (label, key) in zip(
+        st.columns(4),
+        [("Today", "today"), ("Week", "week"), ("Month", "month"), ("Total", "all")],
+    ):
+        p = metrics.periods[key]
+        col.metric(label, f"{p.bets} bets", f"${p.pl:,.0f}")
 
     st.divider()
 
     # Core metrics
     st.markdown("### 🎯 Key Metrics")
     c1, c2, c3, c4 = st.columns(4)
-    c1.metric("Net P/L", f"${total_s['net_pl']:,.2f}")
-    c2.metric("ROI", f"{total_s['roi_pct']:.1f}%")
-    c3.metric("Hit Rate", f"{total_s['accuracy_pct']:.1f}%")
-
-    s_text, s_color = get_streak_stats(df_filtered)
+    c1.metric("Net P/L", f"${total_s.pl:,.2f}")
+    c2.metric("ROI", f"{total_s.roi:.1f}%")
+    c3.metric("Hit Rate", f"{total_s.hit_rate:.1f}%")
     with c4:
-        st.metric("Streak", s_text)
-
+        st.metric("Streak", metrics.streak)
 
     c5, c6, c7, c8 = st.columns(4)
-    c5.metric("Turnover", f"${total_s['turnover']:,.2f}")
-    c6.metric("Avg Odds", f"{pd.to_numeric(df_filtered['Odds']).mean():.2f}")
-    c7.metric("Avg Stake", f"${pd.to_numeric(df_filtered['Stake']).mean():.2f}")
-    c8.metric("Open Risk", f"${total_s['open_risk']:,.2f}")
+    c5.metric("Turnover", f"${total_s.turnover:,.2f}")
+    c6.metric("Avg Odds", f"{metrics.avg_odds:.2f}")
+    c7.metric("Avg Stake", f"${metrics.avg_stake:.2f}")
+    c8.metric("Open Risk", f"${metrics.open_risk:,.2f}")
 
-    st.divider()
 
-    # Charts - uses exploded df so parlay legs count per sport
-    st.markdown("### 📊 Breakdown")
+def _render_drawdown(curve):
+    st.markdown("### 📉 Drawdown")
+    d1, d2, d3, d4 = st.columns(4)
+    d1.metric("Max Drawdown", f"${curve.max_drawdown:,.2f}")
+    under = curve.underwater_days()
+    d2.metric("Current Drawdown", f"${curve.drawdown:,.2f}",
+              f"{under} days under water" if curve.drawdown > 0 else "at peak", delta_color="off")
+    d3.metric("Longest Under Water", f"{curve.longest_underwater_days} days",
+              f"{curve.longest_underwater_bets} bets", delta_color="off")
+    d4.metric("Longest Losing Run", curve.longest_losing_run,
+              f"current {curve.losing_run}", delta_color="off")
+
+
+@timed("chart:breakdown")
+def _render_breakdown(agg):
+    # Uses the exploded df so parlay legs count per sport
     ch1, ch2, ch3 = st.columns(3)
 
     with ch1:
-        sport_pl = df_exploded.groupby("Sport")["P/L"].sum().sort_values(ascending=False).head(8)
-        fig1 = px.bar(x=sport_pl.index, y=sport_pl.values,
-                      title="P/L by Sport (incl. parlay legs)",
-                      color_discrete_sequence=["#00ffc8"])
-        fig1.update_layout(height=280, margin=dict(t=30, b=10, l=10, r=10))
+        sport_pl = agg["sport_pl"]
+        fig1 = cached_figure("sport_pl", lambda: px.bar(
+            x=sport_pl.index, y=sport_pl.values,
+            title="P/L by Sport (incl. parlay legs)",
+            color_discrete_sequence=["#00ffc8"],
+        ), sport_pl, BREAKDOWN_LAYOUT)
         st.plotly_chart(fig1, use_container_width=True)
 
     with ch2:
-        bookie_stake = df_filtered.groupby("Bookie")["Stake"].sum().sort_values(ascending=False).head(6)
-        fig2 = px.pie(values=bookie_stake.values, names=bookie_stake.index,
-                      title="Stake by Bookie", hole=0.4)
-        fig2.update_traces(textposition="inside", textinfo="percent+label")
-        fig2.update_layout(height=280, margin=dict(t=30, b=10, l=10, r=10))
+        bookie_stake = agg["bookie_stake"]
+        fig2 = cached_figure("bookie_stake", lambda: px.pie(
+            values=bookie_stake.values, names=bookie_stake.index,
+            title="Stake by Bookie", hole=0.4,
+        ).update_traces(textposition="inside", textinfo="percent+label"), bookie_stake, BREAKDOWN_LAYOUT)
         st.plotly_chart(fig2, use_container_width=True)
 
     with ch3:
-        type_pl = df_filtered.groupby("Type")["P/L"].sum()
-        fig3 = px.bar(x=type_pl.index, y=type_pl.values,
-                      title="P/L by Type",
-                      color_discrete_sequence=["#ff6b6b"])
-        fig3.update_layout(height=280, margin=dict(t=30, b=10, l=10, r=10))
+        type_pl = agg["type_pl"]
+        fig3 = cached_figure("type_pl", lambda: px.bar(
+            x=type_pl.index, y=type_pl.values,
+            title="P/L by Type",
+            color_discrete_sequence=["#ff6b6b"],
+        ), type_pl, BREAKDOWN_LAYOUT)
         st.plotly_chart(fig3, use_container_width=True)
 
     # League breakdown (exploded)
-    league_pl = df_exploded.groupby("League")["P/L"].sum().sort_values(ascending=False).head(8)
+    league_pl = agg["league_pl"]
     if len(league_pl) > 0:
-        fig_l = px.bar(x=league_pl.index, y=league_pl.values,
-                       title="P/L by League (incl. parlay legs)",
-                       color_discrete_sequence=["#00d4ff"])
-        fig_l.update_layout(height=280, margin=dict(t=30, b=10, l=10, r=10))
+        fig_l = cached_figure("league_pl", lambda: px.bar(
+            x=league_pl.index, y=league_pl.values,
+            title="P/L by League (incl. parlay legs)",
+            color_discrete_sequence=["#00d4ff"],
+        ), league_pl, BREAKDOWN_LAYOUT)
         st.plotly_chart(fig_l, use_container_width=True)
 
-    st.divider()
 
-    # Growth chart
-    st.markdown("### 📈 Cumulative P/L")
-    df_growth = df_filtered.sort_values("Date").copy()
-    df_growth["Cumulative"] = pd.to_numeric(df_growth["P/L"]).cumsum()
-    fig_g = go.Figure(go.Scatter(
-        x=df_growth["Date"], y=df_growth["Cumulative"],
-        fill="tozeroy", line=dict(color="#00ffc8", width=3)
+def _growth_points(agg, resolution, budget):
+    """Cumulative P/L reduced to what the chart draws: closes, then min/max buckets."""
+    x, y = agg["growth_x"], agg["growth_y"]
+    freq = GROWTH_RESOLUTIONS[resolution]
+    if freq:
+        closes = resample_closes(x, y, freq)
+        x, y = closes.index, closes.to_numpy()
+    total = len(y)
+    if budget != "All":
+        x, y = downsample_minmax(x, y, budget)
+    return {"x": np.asarray(x), "y": np.asarray(y, dtype=float), "total": total}
+
+
+def _confidence(df, legs, filters, by):
+    df = _apply_filters(df, filters)
+    # Sport/League follow the breakdown charts: parlays split per leg, but a
+    # ticket's legs are resampled together.
+    if by in ("Sport", "League"):
+        return bootstrap_ci(explode_legs(df, legs), by, workers=CI_WORKERS, cluster="id")
+    return bootstrap_ci(df, by, workers=CI_WORKERS)
+
+
+@timed("chart:confidence")
+def _render_confidence(ci, by):
+    shown = ci.head(CI_SHOWN)
+    fig = cached_figure("confidence", lambda: go.Figure(go.Bar(
+        x=shown.index, y=shown["ROI"],
+        error_y=dict(type="data", array=shown["ROI High"] - shown["ROI"], arrayminus=shown["ROI"] - shown["ROI Low"]),
+        customdata=shown[["Bets", "ROI Low", "ROI High", "Hit Rate", "Hit Low", "Hit High"]].to_numpy(),
+        hovertemplate=(
+            "%{x}<br>ROI %{y:.1f}% (%{customdata[1]:.1f} to %{customdata[2]:.1f})"
+            "<br>Hit rate %{customdata[3]:.1f}% (%{customdata[4]:.1f} to %{customdata[5]:.1f})"
+            "<br>%{customdata[0]} bets<extra></extra>"
+        ),
+        marker_color=["#00ffc8" if lo > 0 else "#ff6b6b" if hi < 0 else "#8b949e"
+                      for lo, hi in zip(shown["ROI Low"], shown["ROI High"])],
+    )), shown, dict(template="plotly_dark", height=320, yaxis_title="ROI %", margin=dict(t=20, b=20, l=20, r=20)))
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption(
+        f"95% bootstrap intervals on settled bets, largest {len(shown)} of {len(ci)} groups by {by}. "
+        "Green: edge above zero; red: below zero; grey: not distinguishable from noise."
+    )
+
+
+def _parse_edges(text):
+    edges = sorted({float(x) for x in text.replace(";", ",").split(",") if x.strip()})
+    if len(edges) < 2:
+        raise ValueError("need at least two edges")
+    return tuple(edges)
+
+
+@timed("chart:calibration")
+def _render_calibration(cal, mode):
+    fig = cached_figure("calibration", lambda: go.Figure([
+        go.Bar(x=cal.index, y=cal["Expected Hit"], name="Expected (1/odds)", marker_color="#8b949e"),
+        go.Bar(
+            x=cal.index, y=cal["Actual Hit"], name="Actual", marker_color="#00ffc8",
+            customdata=cal[["Bets", "ROI", "Edge"]].to_numpy(),
+            hovertemplate=(
+                "%{x}<br>Actual %{y:.1f}% · edge %{customdata[2]:+.1f} pts"
+                "<br>ROI %{customdata[1]:.1f}% · %{customdata[0]} bets<extra></extra>"
+            ),
+        ),
+    ]), cal, dict(
+        template="plotly_dark", height=320, barmode="group", xaxis_title=mode, yaxis_title="Hit rate %",
+        legend=dict(orientation="h", y=1.1), margin=dict(t=30, b=20, l=20, r=20),
     ))
-    fig_g.update_layout(template="plotly_dark", height=380, margin=dict(t=20, b=20, l=20, r=20))
+    st.plotly_chart(fig, use_container_width=True)
+    with st.expander("Bucket table", expanded=False):
+        st.dataframe(cal, use_container_width=True, column_config={
+            col: st.column_config.NumberColumn(format="%.1f") for col in ["Expected Hit", "Actual Hit", "Edge", "ROI"]
+        } | {"P/L": st.column_config.NumberColumn(format="$%.2f")})
+
+
+@timed("chart:growth")
+def _render_growth(points):
+    trace = go.Scattergl if len(points["y"]) > WEBGL_POINTS else go.Scatter
+    fig_g = cached_figure("growth", lambda: go.Figure(trace(
+        x=points["x"], y=points["y"],
+        fill="tozeroy", line=dict(color="#00ffc8", width=3)
+    )), (points["x"], points["y"]), GROWTH_LAYOUT)
     st.plotly_chart(fig_g, use_container_width=True)
+    if len(points["y"]) < points["total"]:
+        st.caption(f"Showing {len(points['y']):,} of {points['total']:,} points (peaks and troughs kept).")
+
+
+@profiling.fragment("fragment:confidence")
+def _render_confidence_section(df_bets, filters):
+    st.markdown("### 🎯 Edge Confidence")
+    # Thousands of resamples per group: computed on request, not every render.
+    with st.form("ci_f"):
+        by = st.selectbox("Group by", CI_GROUPS, key="ci_by")
+        if st.form_submit_button("Compute intervals"):
+            st.session_state.ci_request = (st.session_state.data_version, freeze(filters), by)
+    if st.session_state.get("ci_request") != (st.session_state.data_version, freeze(filters), by):
+        st.caption("Bootstrap intervals show which groups have an edge beyond noise.")
+        return
+    with st.spinner("Resampling..."):
+        ci = cached_analytics(
+            "bootstrap_ci", lambda: _confidence(df_bets, st.session_state.legs_df, filters, by), (filters, by)
+        )
+    if ci.empty:
+        st.caption("No settled bets to test yet.")
+    else:
+        _render_confidence(ci, by)
+
+
+@profiling.fragment("fragment:calibration")
+def _render_calibration_section(df_bets, filters):
+    st.markdown("### 🎚️ Calibration")
+    k1, k2 = st.columns([2, 3])
+    mode = k1.radio("Bin by", list(CALIBRATION_MODES), horizontal=True, key="cal_mode")
+    by, default_edges = CALIBRATION_MODES[mode]
+    edges_text = k2.text_input(
+        "Bucket edges", ", ".join(f"{e:g}" for e in default_edges), key=f"cal_edges_{by}"
+    )
+    try:
+        edges = _parse_edges(edges_text)
+    except ValueError as e:
+        st.error(f"Invalid bucket edges: {e}")
+        return
+    cal = cached_analytics(
+        "calibration", lambda: calibration(_apply_filters(df_bets, filters), by, edges), (filters, by, edges)
+    )
+    _render_calibration(cal, mode)
+
+
+@profiling.fragment("fragment:growth")
+def _render_growth_section(agg, filters):
+    st.markdown("### 📈 Cumulative P/L")
+    r1, r2 = st.columns([2, 3])
+    resolution = r1.radio("Resolution", list(GROWTH_RESOLUTIONS), horizontal=True, key="growth_resolution")
+    budget = r2.select_slider("Max points", GROWTH_BUDGETS, value=2000, key="growth_budget")
+    points = cached_analytics(
+        "growth", lambda: _growth_points(agg, resolution, budget), (filters, date.today(), resolution, budget)
+    )
+    _render_growth(points)
+
+
+@profiling.fragment("fragment:filtered")
+def _render_filtered(df_bets, options):
+    """
+    Filters and everything they drive; changing a filter reruns only this.
+    Each section's own controls rerun only that section.
+    """
+    with st.expander("🔍 Filters", expanded=False):
+        col1, col2, col3 = st.columns(3)
+        filters = {
+            "Bookie": col1.multiselect("Bookie", options["Bookie"]),
+            "Type": col2.multiselect("Bet Type", options["Type"]),
+            "Sport": col3.multiselect("Sport", options["Sport"]),
+        }
+
+    # Period windows depend on the calendar day, so it is part of the key.
+    agg = cached_analytics(
+        "dashboard", lambda: _aggregate(df_bets, st.session_state.legs_df, filters), (filters, date.today())
+    )
+    if agg is None:
+        st.info("Log your first bet to activate analytics.")
+        return
+
+    _render_metrics(agg["metrics"])
+    # Unfiltered, the data layer keeps the curve current per settlement.
+    if any(filters.values()):
+        curve = cached_analytics("equity", lambda: EquityCurve.build(_apply_filters(df_bets, filters)), filters)
+    else:
+        curve = equity_curve()
+    _render_drawdown(curve)
+    st.divider()
+
+    st.markdown("### 📊 Breakdown")
+    _render_breakdown(agg)
+    st.divider()
+
+    _render_confidence_section(df_bets, filters)
+    st.divider()
+
+    _render_calibration_section(df_bets, filters)
+    st.divider()
+
+    _render_growth_section(agg, filters)
+
+
+def render_dashboard():
+    df_bets = get_bets()
+    st.title("Performance Intelligence")
+
+    options = cached_analytics("dashboard_filter_options", lambda: _filter_options(df_bets))
+    _render_filtered(df_bets, options)
@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
 
-from data.data_layer import clear_user_data
+from data.data_layer import clear_user_data, refresh_from_cloud, set_meta
 
 
 def render_settings():
@@ -47,12 +47,20 @@ def render_settings():
             "Types":    [x.strip() for x in t_v.split("\n") if x.strip()],
             "Tipsters": [x.strip() for x in tip_v.split("\n") if x.strip()],
         }
-        st.session_state.meta_df = pd.DataFrame.from_dict(
-            u_meta, orient="index"
-        ).transpose()
-        st.session_state.unsaved_count += 1
+        set_meta(pd.DataFrame.from_dict(u_meta, orient="index").transpose())
         st.success("Configuration updated locally. Push to cloud to persist.")
 
+    st.divider()
+    st.subheader("Cloud Data")
+    st.caption(
+        "Your data is served from a local snapshot and checked against the sheet "
+        "in the background. Force a full reload if the sheet was edited elsewhere."
+    )
+    if st.button("Reload From Cloud", disabled=st.session_state.unsaved_count > 0):
+        refresh_from_cloud(st.session_state.username)
+    if st.session_state.unsaved_count > 0:
+        st.caption("Sync your unsaved changes before reloading.")
+
     st.divider()
     st.subheader("Danger Zone")
     st.warning(
@@ -0,0 +1,55 @@
+import streamlit as st
+import plotly.graph_objects as go
+
+from data.analytics import tipster_leaderboard
+from data.data_layer import cached_analytics, get_bets
+from views.charts import cached_figure
+
+SORT_BY = ["P/L", "ROI", "Hit Rate", "Picks", "Stake"]
+CHART_TOP = 15
+
+
+def render_tipsters():
+    df_bets = get_bets()
+    st.title("Tipster Leaderboard")
+
+    board = cached_analytics(
+        "tipsters", lambda: tipster_leaderboard(df_bets, st.session_state.legs_df)
+    )
+    if board.empty:
+        st.info("No tipsters yet. Tag singles or parlay legs with a tipster to rank them.")
+        return
+
+    c1, c2 = st.columns([2, 3])
+    sort_by = c1.selectbox("Rank by", SORT_BY)
+    min_picks = c2.number_input("Minimum picks", 1, value=1, step=1)
+
+    ranked = board[board["Picks"] >= min_picks].sort_values(sort_by, ascending=False)
+    if ranked.empty:
+        st.caption("No tipster has that many picks.")
+        return
+
+    st.dataframe(
+        ranked,
+        use_container_width=True,
+        column_config={
+            "Stake": st.column_config.NumberColumn(format="$%.2f"),
+            "P/L": st.column_config.NumberColumn(format="$%.2f"),
+            "ROI": st.column_config.NumberColumn(format="%.1f%%"),
+            "Hit Rate": st.column_config.NumberColumn(format="%.1f%%"),
+            "Avg Odds": st.column_config.NumberColumn(format="%.2f"),
+        },
+    )
+    st.caption(
+        "Parlay legs count as one pick each with an equal share of the ticket's stake, "
+        "P/L and result. Stake, P/L, ROI and hit rate cover settled bets."
+    )
+
+    top = ranked.head(CHART_TOP)
+    fig = cached_figure("tipsters", lambda: go.Figure(go.Bar(
+        x=top.index, y=top[sort_by],
+        marker_color=["#00ffc8" if v >= 0 else "#ff4b4b" for v in top["P/L"]],
+    )), (top, sort_by), dict(
+        template="plotly_dark", height=320, yaxis_title=sort_by, margin=dict(t=20, b=20, l=20, r=20),
+    ))
+    st.plotly_chart(fig, use_container_width=True)
@@ -1,8 +1,15 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 from datetime import date
 import json
 
+import profiling
+from data.data_layer import (
+    add_bet, cached_analytics, delete_bet, delete_bets, get_bets, search_index, settle_bets,
+)
+from data.schema import STATUSES
+
 
 def _init_ticket_buffer():
     if "ticket_legs" not in st.session_state:
@@ -33,15 +40,14 @@ def _render_ticket_legs(df_meta):
     with add_col:
         st.caption("Each leg has its own sport, league, tipster and odds.")
     with odds_col:
-        if st.button("➕ Add Match"):
-            st.session_state.ticket_legs.append({
-                "sport": sports[0] if sports else "",
-                "league": leagues[0] if leagues else "",
-                "event": "",
-                "odds": 1.91,
-                "tipster": "",
-            })
-            st.rerun()
+        # Callbacks run before the fragment reruns, so no st.rerun is needed.
+        st.button("➕ Add Match", on_click=st.session_state.ticket_legs.append, args=({
+            "sport": sports[0] if sports else "",
+            "league": leagues[0] if leagues else "",
+            "event": "",
+            "odds": 1.91,
+            "tipster": "",
+        },))
 
     if not st.session_state.ticket_legs:
         st.info("Click Add Match to build your ticket.")
@@ -68,9 +74,7 @@ def _render_ticket_legs(df_meta):
                 index=(tipsters.index(leg["tipster"]) if leg.get("tipster") in tipsters else 0),
                 key=f"leg_tipster_{i}",
             )
-            if c4.button("✕", key=f"leg_remove_{i}"):
-                st.session_state.ticket_legs.pop(i)
-                st.rerun()
+            c4.button("✕", key=f"leg_remove_{i}", on_click=st.session_state.ticket_legs.pop, args=(i,))
 
             e1, e2 = st.columns([3, 1])
             leg["event"] = e1.text_input(
@@ -104,8 +108,300 @@ def _render_ticket_legs(df_meta):
     )
 
 
+HISTORY_SORTS = {
+    "Newest first": (["Date", "id"], False),
+    "Oldest first": (["Date", "id"], True),
+    "Biggest stake": (["Stake", "id"], False),
+    "Best P/L": (["P/L", "id"], False),
+    "Worst P/L": (["P/L", "id"], True),
+    "Longest odds": (["Odds", "id"], False),
+}
+HISTORY_COLUMNS = [
+    "id", "Date", "Sport", "League", "Bookie", "Type", "Event",
+    "Odds", "Stake", "Status", "P/L", "Tipster",
+]
+
+
+def _history_order(df, s_d, s_t, sort_key):
+    """Row positions of the filtered, sorted history. Pages are slices of this."""
+    mask = np.ones(len(df), dtype=bool)
+    if s_d:
+        mask &= (df["Date"] == pd.Timestamp(s_d)).to_numpy()
+    if s_t:
+        mask &= df["id"].isin(search_index().search(s_t)).to_numpy()
+    cols, ascending = HISTORY_SORTS[sort_key]
+    positions = np.flatnonzero(mask)
+    ranked = df.iloc[positions].reset_index(drop=True).sort_values(cols, ascending=ascending, kind="stable")
+    return positions[ranked.index.to_numpy()]
+
+
+def _date_label(value) -> str:
+    # Blank dates load as NaT, which has no strftime.
+    return "No date" if pd.isna(value) else f"{value:%Y-%m-%d}"
+
+
+def _render_history_card(row):
+    tag = "🎯 PARLAY" if row.get("Sport") == "Parlay" else row.get("Sport", "")
+    tipster_tag = f" · {row['Tipster']}" if row.get("Tipster") else ""
+    label = f"{_date_label(row['Date'])} | {tag} | {row['Event']} ({row['Status']}){tipster_tag}"
+    with st.expander(label):
+        info_c, del_c = st.columns([5, 1])
+        info_c.write(
+            f"**{row['Type']}** · **{row['Bookie']}**  "
+            f"| Odds: {row['Odds']}  "
+            f"| Stake: ${row['Stake']:.2f}  "
+            f"| P/L: ${row['P/L']:.2f}"
+        )
+        if row.get("Tipster"):
+            info_c.caption(f"Tipster: {row['Tipster']}")
+
+        if row.get("Sport") == "Parlay" and row.get("Legs"):
+            try:
+                legs = json.loads(row["Legs"])
+                if legs:
+                    st.markdown("**Legs:**")
+                    for leg in legs:
+                        tip_label = f" · _{leg.get('tipster','')}_" if leg.get("tipster") and leg.get("tipster") != "— None —" else ""
+                        st.write(
+                            f"• **{leg.get('sport','')}** / {leg.get('league','')} "
+                            f"— {leg.get('event','')} @ **{leg.get('odds','')}**{tip_label}"
+                        )
+            except Exception:
+                pass
+
+        if del_c.button("Delete", key=f"del_{row['id']}", type="secondary"):
+            delete_bet(row["id"])
+            st.rerun()
+
+
+def _set_hist_page(page: int):
+    st.session_state.hist_page = page
+
+
+@profiling.fragment("fragment:history")
+def _render_history():
+    """Filters, paging and cards rerun on their own; deletes rerun the app."""
+    df_view = get_bets()
+    h1, h2, h3, h4, h5 = st.columns([2, 2, 2, 1, 1])
+    s_d = h1.date_input("Filter Date", value=None)
+    s_t = h2.text_input("Search", placeholder="Event, leg or tipster")
+    sort_key = h3.selectbox("Sort", list(HISTORY_SORTS))
+    page_size = h4.selectbox("Per page", [10, 25, 50, 100], index=1)
+    grid = h5.toggle("Grid", help="Compact table with multi-row delete")
+
+    order = cached_analytics(
+        "history_order", lambda: _history_order(df_view, s_d, s_t, sort_key), (s_d, s_t, sort_key)
+    )
+    if len(order) == 0:
+        st.info("No records match the current filters.")
+        return
+
+    # The page cursor and grid selection reset whenever the query changes.
+    query = (s_d, s_t, sort_key, page_size)
+    if st.session_state.get("hist_query") != query:
+        st.session_state.hist_query = query
+        st.session_state.hist_page = 0
+        st.session_state.hist_rev = st.session_state.get("hist_rev", 0) + 1
+    n_pages = (len(order) - 1) // page_size + 1
+    page = min(st.session_state.hist_page, n_pages - 1)
+
+    start = page * page_size
+    page_df = df_view.iloc[order[start:start + page_size]]
+
+    if grid:
+        cols = [c for c in HISTORY_COLUMNS if c in page_df.columns]
+        event = st.dataframe(
+            page_df[cols],
+            hide_index=True,
+            use_container_width=True,
+            on_select="rerun",
+            selection_mode="multi-row",
+            # Selections are row positions: a new key drops them once the rows move.
+            key=f"hist_grid_{page}_{st.session_state.hist_rev}_{st.session_state.data_version}",
+        )
+        selected = page_df["id"].iloc[event.selection.rows].tolist()
+        if selected and st.button(f"Delete {len(selected)} selected", type="secondary"):
+            delete_bets(selected)
+            st.rerun()
+    else:
+        for _, row in page_df.iterrows():
+            _render_history_card(row)
+
+    nav1, nav2, nav3 = st.columns([1, 2, 1])
+    nav1.button("◀ Prev", disabled=page == 0, use_container_width=True,
+                on_click=_set_hist_page, args=(page - 1,))
+    nav2.caption(
+        f"Page {page + 1} of {n_pages} · {start + 1}–{min(start + page_size, len(order))} of {len(order)} bets"
+    )
+    nav3.button("Next ▶", disabled=page >= n_pages - 1, use_container_width=True,
+                on_click=_set_hist_page, args=(page + 1,))
+
+
+@profiling.fragment("fragment:settlement_card")
+def _render_settlement_card(row):
+    """One open bet; picking a result reruns only this card."""
+    with st.container(border=True):
+        pc1, pc2, pc3 = st.columns([3, 2, 1])
+        pc1.write(f"**{row['Event']}**  ·  ${row['Stake']:.2f}  ·  {row['Bookie']}")
+        if row.get("Tipster"):
+            pc1.caption(f"Tipster: {row['Tipster']}")
+
+        if row.get("Sport") == "Parlay" and row.get("Legs"):
+            try:
+                legs = json.loads(row["Legs"])
+                with pc1:
+                    for leg in legs:
+                        tip_label = f" · {leg.get('tipster','')}" if leg.get("tipster") and leg.get("tipster") != "— None —" else ""
+                        st.caption(f"└ {leg.get('sport','')} · {leg.get('event','')} @ {leg.get('odds','')}{tip_label}")
+            except Exception:
+                pass
+
+        res = pc2.selectbox(
+            "Result",
+            STATUSES,
+            key=f"r_{row['id']}",
+        )
+
+        co = 0.0
+        if res == "Cashed Out":
+            co = pc3.number_input(
+                "Payout",
+                min_value=0.0,
+                key=f"c_{row['id']}",
+                value=row["Stake"],
+            )
+
+        if res != "Pending" and st.button("Set Result", key=f"b_{row['id']}"):
+            settle_bets(pd.DataFrame([{"id": row["id"], "Status": res, "Payout": co}]))
+            st.rerun()
+
+
+def _render_settlement_cards(pending):
+    for _, row in pending.iterrows():
+        _render_settlement_card(row)
+
+
+# Above this many open positions the Settlement tab opens in grid mode.
+BULK_SETTLE_THRESHOLD = 20
+
+
+@profiling.fragment("fragment:bulk_settlement")
+def _render_bulk_settlement(pending):
+    grid = pending[["id", "Date", "Event", "Bookie", "Odds", "Stake"]].assign(
+        Result="Pending", Payout=pending["Stake"]
+    )
+    edited = st.data_editor(
+        grid,
+        hide_index=True,
+        use_container_width=True,
+        disabled=["id", "Date", "Event", "Bookie", "Odds", "Stake"],
+        column_config={
+            "Date": st.column_config.DateColumn(format="YYYY-MM-DD"),
+            "Result": st.column_config.SelectboxColumn(options=STATUSES, required=True),
+            "Payout": st.column_config.NumberColumn(
+                min_value=0.0, format="%.2f", help="Only used for Cashed Out"
+            ),
+        },
+        # New key per data version so edits never carry over to other rows.
+        key=f"bulk_settle_{st.session_state.data_version}",
+    )
+    marked = edited[edited["Result"] != "Pending"]
+    if st.button(f"Apply {len(marked)} results", type="primary", disabled=marked.empty):
+        settled = settle_bets(marked.rename(columns={"Result": "Status"}))
+        st.success(f"Settled {settled} bets locally.")
+        st.rerun()
+
+
+@profiling.fragment("fragment:add_bet")
+def _render_add_bet(df_meta):
+    """Ticket builder and bet form; editing legs reruns only this fragment."""
+    mode_col1, mode_col2 = st.columns([1, 4])
+    with mode_col1:
+        st.session_state.ticket_mode = st.radio(
+            "Mode",
+            ["Single", "Multi-match ticket"],
+            horizontal=False,
+        )
+
+    is_multi = st.session_state.ticket_mode == "Multi-match ticket"
+
+    if is_multi:
+        _render_ticket_legs(df_meta)
+
+    with st.form("add_w_f", clear_on_submit=True):
+        c1, c2, c3 = st.columns(3)
+
+        sports_list = df_meta["Sports"].dropna().tolist()
+        leagues_list = df_meta["Leagues"].dropna().tolist()
+        bookies_list = df_meta["Bookies"].dropna().tolist()
+        types_list = df_meta["Types"].dropna().tolist()
+        tipsters_list = ["— None —"] + df_meta["Tipsters"].dropna().tolist() \
+            if "Tipsters" in df_meta.columns else ["— None —"]
+
+        w_d = c1.date_input("Date", date.today())
+
+        if not is_multi:
+            w_s = c1.selectbox("Sport", sports_list)
+            w_l = c1.selectbox("League", leagues_list)
+        else:
+            c1.markdown(
+                "<div style='color:#8b9ba5;font-size:12px;padding-top:8px;'>"
+                "Sport & League set per leg above.</div>",
+                unsafe_allow_html=True,
+            )
+            w_s = "Parlay"
+            w_l = "Multi"
+
+        w_b = c2.selectbox("Bookie", bookies_list)
+        w_t = c2.selectbox("Type", types_list)
+
+        if not is_multi:
+            w_e = c2.text_input("Selection / Event")
+            w_o = c3.number_input("Decimal Odds", 1.01, 1000.0, 1.91)
+            w_tip = c3.selectbox("Tipster", tipsters_list)
+        else:
+            w_e = c2.text_input("Ticket Name / Notes")
+            current_odds = _ticket_odds()
+            c3.metric("Ticket Odds", f"{current_odds:.3f}")
+            w_o = current_odds
+            w_tip = "— None —"
+
+        w_st = c3.number_input("Stake", 1.0, 100000.0, 10.0)
+        w_res = c3.selectbox("Status", ["Pending", "Won", "Lost", "Push", "Cashed Out"])
+
+        submitted = st.form_submit_button("Log Locally")
+        if submitted:
+            if w_res == "Won":
+                pl = w_st * w_o - w_st
+            elif w_res == "Lost":
+                pl = -w_st
+            else:
+                pl = 0.0
+
+            legs_json = ""
+            if is_multi:
+                legs_json = json.dumps(st.session_state.ticket_legs)
+
+            tipster_val = "" if w_tip == "— None —" else w_tip
+
+            try:
+                add_bet({
+                    "Date": w_d, "Sport": w_s, "League": w_l, "Bookie": w_b, "Type": w_t,
+                    "Event": w_e, "Odds": w_o, "Stake": w_st, "Status": w_res, "P/L": pl,
+                    "Cashout_Amt": 0.0, "Legs": legs_json, "Tipster": tipster_val,
+                })
+            except ValueError as e:
+                st.error(f"Bet not logged: {e}")
+                st.stop()
+
+            if is_multi:
+                st.session_state.ticket_legs = []
+
+            st.success("Bet logged locally. Push to cloud to save.")
+            st.rerun()
+
+
 def render_wagers(user: str):
-    df_bets = st.session_state.bets_df
     df_meta = st.session_state.meta_df
 
     _init_ticket_buffer()
@@ -120,212 +416,26 @@ def render_wagers(user: str):
     # ADD BET
     # ------------------------------------------------------------------
     with t_add:
-        mode_col1, mode_col2 = st.columns([1, 4])
-        with mode_col1:
-            st.session_state.ticket_mode = st.radio(
-                "Mode",
-                ["Single", "Multi-match ticket"],
-                horizontal=False,
-            )
-
-        is_multi = st.session_state.ticket_mode == "Multi-match ticket"
-
-        if is_multi:
-            _render_ticket_legs(df_meta)
-
-        with st.form("add_w_f", clear_on_submit=True):
-            c1, c2, c3 = st.columns(3)
-
-            sports_list = df_meta["Sports"].dropna().tolist()
-            leagues_list = df_meta["Leagues"].dropna().tolist()
-            bookies_list = df_meta["Bookies"].dropna().tolist()
-            types_list = df_meta["Types"].dropna().tolist()
-            tipsters_list = ["— None —"] + df_meta["Tipsters"].dropna().tolist() \
-                if "Tipsters" in df_meta.columns else ["— None —"]
-
-            w_d = c1.date_input("Date", date.today())
-
-            if not is_multi:
-                w_s = c1.selectbox("Sport", sports_list)
-                w_l = c1.selectbox("League", leagues_list)
-            else:
-                c1.markdown(
-                    "<div style='color:#8b9ba5;font-size:12px;padding-top:8px;'>"
-                    "Sport & League set per leg above.</div>",
-                    unsafe_allow_html=True,
-                )
-                w_s = "Parlay"
-                w_l = "Multi"
-
-            w_b = c2.selectbox("Bookie", bookies_list)
-            w_t = c2.selectbox("Type", types_list)
-
-            if not is_multi:
-                w_e = c2.text_input("Selection / Event")
-                w_o = c3.number_input("Decimal Odds", 1.01, 1000.0, 1.91)
-                w_tip = c3.selectbox("Tipster", tipsters_list)
-            else:
-                w_e = c2.text_input("Ticket Name / Notes")
-                current_odds = _ticket_odds()
-                c3.metric("Ticket Odds", f"{current_odds:.3f}")
-                w_o = current_odds
-                w_tip = "— None —"
-
-            w_st = c3.number_input("Stake", 1.0, 100000.0, 10.0)
-            w_res = c3.selectbox("Status", ["Pending", "Won", "Lost", "Push", "Cashed Out"])
-
-            submitted = st.form_submit_button("Log Locally")
-            if submitted:
-                if w_res == "Won":
-                    pl = w_st * w_o - w_st
-                elif w_res == "Lost":
-                    pl = -w_st
-                else:
-                    pl = 0.0
-
-                nid = int(df_bets["id"].max() + 1) if not df_bets.empty else 1
-
-                legs_json = ""
-                if is_multi:
-                    legs_json = json.dumps(st.session_state.ticket_legs)
-
-                tipster_val = "" if w_tip == "— None —" else w_tip
-
-                if "Legs" not in st.session_state.bets_df.columns:
-                    st.session_state.bets_df["Legs"] = ""
-                if "Tipster" not in st.session_state.bets_df.columns:
-                    st.session_state.bets_df["Tipster"] = ""
-
-                new_row = pd.DataFrame(
-                    [[nid, w_d, w_s, w_l, w_b, w_t, w_e, w_o, w_st, w_res, pl, 0.0, legs_json, tipster_val]],
-                    columns=["id", "Date", "Sport", "League", "Bookie", "Type",
-                             "Event", "Odds", "Stake", "Status", "P/L", "Cashout_Amt",
-                             "Legs", "Tipster"],
-                )
-
-                for col in st.session_state.bets_df.columns:
-                    if col not in new_row.columns:
-                        new_row[col] = ""
-                new_row = new_row[st.session_state.bets_df.columns]
-
-                st.session_state.bets_df = pd.concat(
-                    [st.session_state.bets_df, new_row], ignore_index=True
-                )
-                st.session_state.unsaved_count += 1
-
-                if is_multi:
-                    st.session_state.ticket_legs = []
-
-                st.success("Bet logged locally. Push to cloud to save.")
-                st.rerun()
+        _render_add_bet(df_meta)
 
     # ------------------------------------------------------------------
     # SETTLEMENT
     # ------------------------------------------------------------------
     with t_pend:
-        pending = st.session_state.bets_df[st.session_state.bets_df["Status"] == "Pending"]
+        bets = get_bets()
+        pending = bets[bets["Status"] == "Pending"]
         if pending.empty:
             st.success("No active exposure.")
         else:
-            st.caption(f"Open positions: {len(pending)}")
-            for idx, row in pending.iterrows():
-                with st.container(border=True):
-                    pc1, pc2, pc3 = st.columns([3, 2, 1])
-                    pc1.write(f"**{row['Event']}**  ·  ${float(row['Stake']):.2f}  ·  {row['Bookie']}")
-                    if row.get("Tipster"):
-                        pc1.caption(f"Tipster: {row['Tipster']}")
-
-                    if row.get("Sport") == "Parlay" and row.get("Legs"):
-                        try:
-                            legs = json.loads(row["Legs"])
-                            with pc1:
-                                for leg in legs:
-                                    tip_label = f" · {leg.get('tipster','')}" if leg.get("tipster") and leg.get("tipster") != "— None —" else ""
-                                    st.caption(f"└ {leg.get('sport','')} · {leg.get('event','')} @ {leg.get('odds','')}{tip_label}")
-                        except Exception:
-                            pass
-
-                    res = pc2.selectbox(
-                        "Result",
-                        ["Pending", "Won", "Lost", "Push", "Cashed Out"],
-                        key=f"r_{row['id']}",
-                    )
-
-                    co = 0.0
-                    if res == "Cashed Out":
-                        co = pc3.number_input(
-                            "Payout",
-                            min_value=0.0,
-                            key=f"c_{row['id']}",
-                            value=float(row["Stake"]),
-                        )
-
-                    if res != "Pending" and st.button("Set Result", key=f"b_{row['id']}"):
-                        if res == "Won":
-                            pl_val = float(row["Stake"]) * float(row["Odds"]) - float(row["Stake"])
-                        elif res == "Lost":
-                            pl_val = -float(row["Stake"])
-                        elif res == "Cashed Out":
-                            pl_val = co - float(row["Stake"])
-                        else:
-                            pl_val = 0.0
-
-                        st.session_state.bets_df.at[idx, "Status"] = res
-                        st.session_state.bets_df.at[idx, "P/L"] = pl_val
-                        if res == "Cashed Out":
-                            st.session_state.bets_df.at[idx, "Cashout_Amt"] = co
-
-                        st.session_state.unsaved_count += 1
-                        st.rerun()
+            cap_c, mode_c = st.columns([4, 1])
+            cap_c.caption(f"Open positions: {len(pending)}")
+            if mode_c.toggle("Bulk grid", value=len(pending) > BULK_SETTLE_THRESHOLD):
+                _render_bulk_settlement(pending)
+            else:
+                _render_settlement_cards(pending)
 
     # ------------------------------------------------------------------
     # HISTORY & DELETE
     # ------------------------------------------------------------------
     with t_hist:
-        df_view = st.session_state.bets_df
-        h1, h2 = st.columns(2)
-        s_d = h1.date_input("Filter Date", value=None)
-        s_t = h2.text_input("Search by event")
-
-        hist = df_view.copy()
-        if s_d:
-            hist = hist[hist["Date"] == s_d]
-        if s_t:
-            hist = hist[hist["Event"].str.contains(s_t, case=False, na=False)]
-
-        if hist.empty:
-            st.info("No records match the current filters.")
-        else:
-            for idx, row in hist.sort_values(["Date", "id"], ascending=False).iterrows():
-                tag = "🎯 PARLAY" if row.get("Sport") == "Parlay" else row.get("Sport", "")
-                tipster_tag = f" · {row['Tipster']}" if row.get("Tipster") else ""
-                label = f"{row['Date']} | {tag} | {row['Event']} ({row['Status']}){tipster_tag}"
-                with st.expander(label):
-                    info_c, del_c = st.columns([5, 1])
-                    info_c.write(
-                        f"**{row['Type']}** · **{row['Bookie']}**  "
-                        f"| Odds: {row['Odds']}  "
-                        f"| Stake: ${float(row['Stake']):.2f}  "
-                        f"| P/L: ${float(row['P/L']):.2f}"
-                    )
-                    if row.get("Tipster"):
-                        info_c.caption(f"Tipster: {row['Tipster']}")
-
-                    if row.get("Sport") == "Parlay" and row.get("Legs"):
-                        try:
-                            legs = json.loads(row["Legs"])
-                            if legs:
-                                st.markdown("**Legs:**")
-                                for leg in legs:
-                                    tip_label = f" · _{leg.get('tipster','')}_" if leg.get("tipster") and leg.get("tipster") != "— None —" else ""
-                                    st.write(
-                                        f"• **{leg.get('sport','')}** / {leg.get('league','')} "
-                                        f"— {leg.get('event','')} @ **{leg.get('odds','')}**{tip_label}"
-                                    )
-                        except Exception:
-                            pass
-
-                    if del_c.button("Delete", key=f"del_{row['id']}", type="secondary"):
-                        st.session_state.bets_df = df_view.drop(idx)
-                        st.session_state.unsaved_count += 1
-                        st.rerun()
+        _render_history()